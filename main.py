@@ -1,5 +1,6 @@
 # import custom libs
 from rocketlib.world import RocketWorld
+from rocketlib.islands import IslandModel
 import rocketlib.utilities as ut
 
 # window settings
@@ -18,6 +19,7 @@ lifeTime = 200  # old 30
 #   'lin'   : Ranking Linear
 #   'exp'   : Ranking Exponential
 #   'fps'   : Fitness Proportional Selection
+#   'tour'  : Tournament Selection
 # Activate Crossover:
 #   boolean
 # Crossover Mode
@@ -35,8 +37,18 @@ modes = ['lin',True,'arith',0.1,'rpl']
 
 if __name__ == "__main__":
 
-    # set up rocket world
-    w = RocketWorld(populationSize, resolution,
-                    lifeTime, ut.to_pygame(target, ymax),framerate=framerate,modes=modes)
-    # run rocket world
-    w.run()
+    # parse command line arguments
+    args = ut.parser()
+
+    if args.islands:
+        # every island evolves with the same modes
+        islands = IslandModel([modes]*args.islands, populationSize, resolution,
+                              lifeTime, ut.to_pygame(target, ymax))
+        islands.run()
+    else:
+        # set up rocket world
+        w = RocketWorld(populationSize, resolution,
+                        lifeTime, ut.to_pygame(target, ymax),framerate=framerate,modes=modes,
+                        headless=args.headless)
+        # run rocket world
+        w.run()
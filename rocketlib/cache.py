@@ -0,0 +1,134 @@
+# coding: utf8
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+class FitnessCache(object):
+    """
+    Description:
+    ------------
+        content-addressed cache of final simulation states. Genomes are
+        identified by a hash of their bytes and the world parameters, so
+        identical genomes are only simulated once. The least recently used
+        entries are dropped if the cache is full.
+    Parameters:
+    -----------
+        maxsize : int
+            maximal number of cached genomes, default: 4096
+        params  : tuple
+            world parameters the simulation depends on, e.g. target,
+            resolution, lifeTime, start position and engine mode
+    """
+
+    def __init__(self, maxsize=4096, params=()):
+        self.maxsize = maxsize
+        self.params = params
+        self._hasher = hashlib.blake2b(repr(params).encode(), digest_size=16)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def keys(self, pool, indices=None):
+        """
+        Description:
+        ------------
+            hash keys of the genomes of a pool
+        Parameters:
+        -----------
+            pool    : GenomePool
+            indices : np.array of ints
+                individuals to hash, default: None (all)
+        Returns:
+        --------
+            keys : list of bytes
+        """
+        if indices is None:
+            indices = range(len(pool))
+        keys = []
+        for i in indices:
+            hasher = self._hasher.copy()
+            hasher.update(np.ascontiguousarray(
+                pool.genes[i, :, :pool.length[i]]).tobytes())
+            keys.append(hasher.digest())
+        return keys
+
+    def lookup(self, pool, indices=None):
+        """
+        Description:
+        ------------
+            find cached final states of the genomes of a pool
+        Parameters:
+        -----------
+            pool    : GenomePool
+            indices : np.array of ints
+                individuals to look up, default: None (all)
+        Returns:
+        --------
+            hits  : np.array of ints
+                individuals with a cached state
+            state : dict of np.arrays
+                final states aligned with hits, see PopulationEngine.state
+        """
+        if indices is None:
+            indices = np.arange(len(pool))
+        hits = []
+        entries = []
+        for i, key in zip(indices, self.keys(pool, indices)):
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                continue
+            self.hits += 1
+            self._entries.move_to_end(key)
+            hits.append(i)
+            entries.append(entry)
+
+        state = {}
+        if entries:
+            for name in entries[0]:
+                state[name] = np.array([entry[name] for entry in entries])
+        return np.asarray(hits, dtype=int), state
+
+    def store(self, pool, state, indices=None):
+        """
+        Description:
+        ------------
+            cache the final states of the genomes of a pool
+        Parameters:
+        -----------
+            pool    : GenomePool
+            state   : dict of np.arrays
+                final states aligned with indices
+            indices : np.array of ints
+                individuals the state belongs to, default: None (all)
+        """
+        if self.maxsize <= 0:
+            return
+        for j, key in enumerate(self.keys(pool, indices)):
+            self._entries[key] = dict((name, values[j])
+                                      for name, values in state.items())
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def info(self):
+        """
+        Returns:
+        --------
+            info : dict
+                number of cache hits, misses, hit rate and cached genomes
+        """
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'rate': self.hits/lookups if lookups else 0.,
+                'size': len(self._entries)}
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,445 @@
+# coding: utf8
+"""
+distributed evaluation over TCP. A Coordinator splits genome pools into
+batches, connected workers simulate them and send back fitness and final
+states. Batches of workers which disconnect or time out are re-queued.
+
+Start workers with
+
+    python -m rocketlib.distributed --host HOST --port PORT --workers N
+
+Messages are a JSON header and a numpy .npz payload, nothing is unpickled.
+"""
+import io
+import json
+import queue
+import socket
+import struct
+import threading
+import time
+import argparse
+import multiprocessing as mp
+
+import numpy as np
+
+import rocketlib.engine as engine
+import rocketlib.fitness as fitness
+from rocketlib.executor import simulate_chunk
+
+# default address of the coordinator
+defaultAddress = ('localhost', 5000)
+
+# seconds a worker waits before it reconnects
+reconnectDelay = 1.
+
+# frame header: length of the JSON header and of the npz payload
+_frame = struct.Struct('!IQ')
+
+
+def _json_default(value):
+    # numpy scalars and arrays in the world parameters
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError("%r is not JSON serializable" % (value,))
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_message(sock, header, arrays=None):
+    """
+    Description:
+    ------------
+        send one message
+    Parameters:
+    -----------
+        sock    : socket.socket
+        header  : dict
+            JSON serializable values, 'type' is the kind of message
+        arrays  : dict of np.arrays
+            payload, default: None
+    """
+    head = json.dumps(header, default=_json_default).encode()
+    buffer = io.BytesIO()
+    if arrays:
+        np.savez(buffer, **arrays)
+    payload = buffer.getvalue()
+    sock.sendall(_frame.pack(len(head), len(payload)) + head)
+    sock.sendall(payload)
+
+
+def recv_message(sock):
+    """
+    Description:
+    ------------
+        receive one message, see send_message
+    Parameters:
+    -----------
+        sock : socket.socket
+    Returns:
+    --------
+        header : dict
+        arrays : dict of np.arrays
+    """
+    headSize, payloadSize = _frame.unpack(_recv_exact(sock, _frame.size))
+    header = json.loads(_recv_exact(sock, headSize).decode())
+    arrays = {}
+    if payloadSize:
+        with np.load(io.BytesIO(_recv_exact(sock, payloadSize)),
+                     allow_pickle=False) as data:
+            arrays = dict((name, data[name]) for name in data.files)
+    return header, arrays
+
+
+def evaluate_task(header, arrays):
+    """
+    Description:
+    ------------
+        simulate one batch and calculate its fitness
+    Parameters:
+    -----------
+        header : dict
+            'params' (see executor.simulate_chunk) and 'threshold'
+        arrays : dict of np.arrays
+            'genes', 'length', optional 'divergence' and the checkpoints
+            with the prefix 'cp_'
+    Returns:
+    --------
+        arrays : dict of np.arrays
+            final state (see PopulationEngine.state), 'rejected' and
+            'fitness', -inf for rejected genomes
+    """
+    params = dict((name, tuple(value) if isinstance(value, list) else value)
+                  for name, value in header['params'].items())
+    checkpoints = dict((name[3:], values) for name, values in arrays.items()
+                       if name.startswith('cp_'))
+    state, rejected = simulate_chunk(
+        params, arrays['genes'], arrays['length'], checkpoints or None,
+        arrays.get('divergence'), header.get('threshold'))
+    values = fitness.calcFitnessArrays(
+        engine.snap(state['pos']), state['travelDist'], params['initialPos'],
+        params['target'], params['resolution'][1], params['target_weight'],
+        params['travel_weight'])[0]
+    values[rejected] = -np.inf
+    result = dict(state)
+    result['rejected'] = rejected
+    result['fitness'] = values
+    return result
+
+
+def serve(address=defaultAddress, retries=10, delay=reconnectDelay):
+    """
+    Description:
+    ------------
+        worker loop, connect to a coordinator and simulate its batches. A
+        lost connection is re-established, the worker stops when the
+        coordinator sends 'stop' or cannot be reached retries times in a
+        row.
+    Parameters:
+    -----------
+        address : tuple
+            host and port of the coordinator
+        retries : int
+            connection attempts before giving up, default: 10
+        delay   : float
+            seconds between two connection attempts, default: 1.
+    """
+    failures = 0
+    while failures < retries:
+        try:
+            sock = socket.create_connection(tuple(address))
+        except OSError:
+            failures += 1
+            time.sleep(delay)
+            continue
+        failures = 0
+        try:
+            with sock:
+                while True:
+                    header, arrays = recv_message(sock)
+                    if header['type'] == 'stop':
+                        return
+                    send_message(sock, {'type': 'result', 'id': header['id']},
+                                 evaluate_task(header, arrays))
+        except (OSError, ValueError):
+            # lost coordinator, try to reconnect
+            time.sleep(delay)
+
+
+def start_local_workers(count, address=defaultAddress):
+    """
+    Description:
+    ------------
+        start worker processes on this machine, e.g. for tests
+    Parameters:
+    -----------
+        count   : int
+        address : tuple
+            host and port of the coordinator
+    Returns:
+    --------
+        processes : list of multiprocessing.Process
+    """
+    processes = []
+    for i in range(count):
+        process = mp.Process(target=serve, args=(tuple(address),))
+        process.daemon = True
+        process.start()
+        processes.append(process)
+    return processes
+
+
+class Coordinator(object):
+    """
+    Description:
+    ------------
+        distributes the simulation of genome pools to TCP workers. Every
+        connected worker is served by a thread which takes batches from a
+        shared queue. If a worker disconnects or does not answer within
+        timeout seconds, its batch is put back into the queue. Without
+        workers evaluate waits the grace period of timeout seconds, at
+        least twice the reconnect delay of serve, for a worker to connect
+        before it fails.
+    Parameters:
+    -----------
+        address     : tuple
+            host and port to listen on, port 0 picks a free port,
+            default: ('localhost', 5000)
+        chunkSize   : int
+            genomes per batch, default: None (two batches per worker)
+        timeout     : float
+            seconds a worker may take for one batch, default: None (no
+            limit)
+        wait        : float
+            seconds evaluate waits for all batches of a pool, default: None
+            (no limit)
+    """
+
+    def __init__(self, address=defaultAddress, chunkSize=None, timeout=None,
+                 wait=None):
+        self.chunkSize = chunkSize
+        self.timeout = timeout
+        self.wait = wait
+        self.grace = max(timeout or 0., 2*reconnectDelay)
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(tuple(address))
+        self._server.listen()
+        self.address = self._server.getsockname()
+
+        self._tasks = queue.Queue()
+        self._results = {}
+        self._done = threading.Condition()
+        self._workers = []
+        self._batch = 0
+        self._closed = False
+        self.requeued = 0
+
+        self._acceptor = threading.Thread(target=self._accept)
+        self._acceptor.daemon = True
+        self._acceptor.start()
+
+    @property
+    def workers(self):
+        """ number of connected workers """
+        return len(self._workers)
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            conn.settimeout(self.timeout)
+            thread = threading.Thread(target=self._serve, args=(conn,))
+            thread.daemon = True
+            with self._done:
+                self._workers.append(conn)
+                self._done.notify_all()
+            thread.start()
+
+    def _serve(self, conn):
+        """ send batches to one worker until it disconnects """
+        try:
+            while True:
+                task = self._tasks.get()
+                if task is None:
+                    send_message(conn, {'type': 'stop'})
+                    return
+                header, arrays = task
+                if header['id'][0] != self._batch:
+                    # left over from a cancelled pool
+                    continue
+                try:
+                    send_message(conn, header, arrays)
+                    reply, result = recv_message(conn)
+                except (OSError, ValueError):
+                    # disconnect or timeout, another worker takes the batch
+                    self._tasks.put(task)
+                    self.requeued += 1
+                    return
+                with self._done:
+                    if (reply.get('id') == header['id'] and
+                            header['id'][0] == self._batch):
+                        self._results[tuple(header['id'])] = result
+                    self._done.notify_all()
+        except OSError:
+            return
+        finally:
+            with self._done:
+                self._workers.remove(conn)
+                self._done.notify_all()
+            conn.close()
+
+    def waitForWorkers(self, count=1, wait=None):
+        """
+        Description:
+        ------------
+            wait until count workers are connected
+        Parameters:
+        -----------
+            count   : int
+                number of workers, default: 1
+            wait    : float
+                seconds to wait, default: None (no limit)
+        Returns:
+        --------
+            connected : boolean
+                True if count workers are connected
+        """
+        with self._done:
+            return self._done.wait_for(lambda: self.workers >= count, wait)
+
+    def chunks(self, size):
+        """
+        Returns:
+        --------
+            bounds : list of tuples
+                start and stop index of every batch
+        """
+        chunkSize = self.chunkSize or -(-size//max(2*self.workers, 1))
+        chunkSize = max(chunkSize, 1)
+        return [(lo, min(lo+chunkSize, size))
+                for lo in range(0, size, chunkSize)]
+
+    def evaluate(self, params, pool, checkpoints=None, divergence=None,
+                 threshold=None, wait=None):
+        """
+        Description:
+        ------------
+            simulate all genomes of a pool on the workers. Workers have to
+            be connected, see waitForWorkers.
+        Parameters:
+        -----------
+            params      : dict
+                world parameters, see executor.simulate_chunk
+            pool        : GenomePool
+            checkpoints : dict of np.arrays
+                checkpoints of the origin parent of every genome
+            divergence  : np.array of ints
+            threshold   : float
+            wait        : float
+                seconds to wait for all batches, default: None (self.wait)
+        Returns:
+        --------
+            fitness : np.array
+            state : dict of np.arrays
+            rejected : np.array of booleans
+        Raises:
+        -------
+            RuntimeError
+                if no worker connects within the grace period, all workers
+                disconnect for longer or the batches are not finished within
+                wait seconds
+        """
+        if wait is None:
+            wait = self.wait
+        if not self.waitForWorkers(1, self.grace):
+            raise RuntimeError("no workers connected to %s:%s" %
+                               tuple(self.address[:2]))
+        self._batch += 1
+        bounds = self.chunks(len(pool))
+        for i, (lo, hi) in enumerate(bounds):
+            arrays = {'genes': pool.genes[lo:hi], 'length': pool.length[lo:hi]}
+            if checkpoints:
+                arrays['divergence'] = divergence[lo:hi]
+                for name, values in checkpoints.items():
+                    arrays['cp_' + name] = values[lo:hi]
+            self._tasks.put(({'type': 'task', 'id': [self._batch, i],
+                              'params': params, 'threshold': threshold},
+                             arrays))
+
+        keys = [(self._batch, i) for i in range(len(bounds))]
+        deadline = None if wait is None else time.time() + wait
+        def complete():
+            return all(key in self._results for key in keys)
+
+        with self._done:
+            while True:
+                remaining = (None if deadline is None else
+                             max(deadline - time.time(), 0.))
+                finished = self._done.wait_for(
+                    lambda: not self.workers or complete(), remaining)
+                if not finished or self.workers or complete():
+                    break
+                # all workers dropped, their batches are queued again, give
+                # them the grace period to reconnect
+                grace = (self.grace if remaining is None else
+                         min(self.grace, remaining))
+                if not self._done.wait_for(lambda: self.workers, grace):
+                    break
+            results = [self._results.pop(key) for key in keys
+                       if key in self._results]
+        if len(results) < len(keys):
+            # workers skip the remaining batches of a cancelled pool
+            self._batch += 1
+            if not finished:
+                raise RuntimeError("workers did not finish within %s s" %
+                                   wait)
+            raise RuntimeError("all workers disconnected")
+
+        if not results:
+            return np.zeros(0), {}, np.zeros(0, dtype=bool)
+        state = {}
+        for name in results[0]:
+            if name not in ('fitness', 'rejected'):
+                state[name] = np.concatenate([result[name]
+                                              for result in results])
+        return (np.concatenate([result['fitness'] for result in results]),
+                state,
+                np.concatenate([result['rejected'] for result in results]))
+
+    def simulate(self, params, pool, checkpoints=None, divergence=None,
+                 threshold=None):
+        """ final state and rejected genomes, see EvaluationExecutor """
+        return self.evaluate(params, pool, checkpoints, divergence,
+                             threshold)[1:]
+
+    def close(self):
+        """ stop all workers and stop listening """
+        self._closed = True
+        for i in range(len(self._workers)):
+            self._tasks.put(None)
+        self._server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="worker for the distributed evaluation of rocket worlds")
+    parser.add_argument("--host", default=defaultAddress[0],
+                        help="host of the coordinator")
+    parser.add_argument("--port", type=int, default=defaultAddress[1],
+                        help="port of the coordinator")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes")
+    args = parser.parse_args()
+    for process in start_local_workers(args.workers, (args.host, args.port)):
+        process.join()
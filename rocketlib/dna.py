@@ -41,3 +41,281 @@ class DNA(object):
 
         # test with uni-dna
         # self.path = np.ones_like(self.path)
+
+
+class FitnessRanking(object):
+    """
+    Description:
+    ------------
+        ranking of one fitness array. Order and statistics are computed on
+        first use and shared by selection, replacement and statistics.
+    Parameters:
+    -----------
+        fitness : np.array
+            fitness of the individuals, must not change afterwards
+    """
+
+    def __init__(self, fitness):
+        self.fitness = np.asarray(fitness, dtype=float)
+        self._order = None
+        self._best = None
+        self._mean = None
+
+    def __len__(self):
+        return len(self.fitness)
+
+    @property
+    def order(self):
+        """ indices in ascending fitness order, stable like list.sort """
+        if self._order is None:
+            self._order = np.argsort(self.fitness, kind='mergesort')
+        return self._order
+
+    @property
+    def best(self):
+        """ index of the individual with the maximal fitness """
+        if self._best is None:
+            self._best = int(np.argmax(self.fitness))
+        return self._best
+
+    @property
+    def max(self):
+        return self.fitness[self.best]
+
+    @property
+    def mean(self):
+        """ mean fitness, rejected individuals (-inf) are left out """
+        if self._mean is None:
+            finite = self.fitness[np.isfinite(self.fitness)]
+            self._mean = np.mean(finite) if len(finite) else np.nan
+        return self._mean
+
+
+class GenomePool(object):
+    """
+    Description:
+    ------------
+        population genome store. All genomes live in one contiguous
+        (N, 2, L) array of accelerations, metadata are arrays per individual.
+    Parameters:
+    -----------
+        genes   : np.array, shape (N, 2, L)
+            acceleration paths, padded with zeros behind length
+        length  : np.array of ints, optional
+            number of valid acceleration steps (DNA.accSteps), default: L
+        fitness : np.array, optional
+            fitness of the individuals, default: 0
+        age     : np.array of ints, optional
+            number of generations the individuals survived, default: 0
+        evaluated : np.array of booleans, optional
+            individuals whose fitness and final state are known from a
+            former simulation, default: False
+        state   : dict of np.arrays, optional
+            final simulation state per individual, see
+            PopulationEngine.state, default: {}
+    """
+
+    def __init__(self, genes, length=None, fitness=None, age=None,
+                 evaluated=None, state=None):
+        self.genes = np.asarray(genes, dtype=float)
+        size = len(self.genes)
+        if length is None:
+            length = np.full(size, np.shape(self.genes)[2], dtype=int)
+        if fitness is None:
+            fitness = np.zeros(size)
+        if age is None:
+            age = np.zeros(size, dtype=int)
+        if evaluated is None:
+            evaluated = np.zeros(size, dtype=bool)
+        self.length = np.asarray(length, dtype=int)
+        self.fitness = fitness
+        self.age = np.asarray(age, dtype=int)
+        self.evaluated = np.asarray(evaluated, dtype=bool)
+        self.state = {} if state is None else state
+
+    def __len__(self):
+        return len(self.genes)
+
+    @property
+    def fitness(self):
+        return self._fitness
+
+    @fitness.setter
+    def fitness(self, fitness):
+        self._fitness = np.asarray(fitness, dtype=float)
+        self._ranking = None
+
+    @property
+    def ranking(self):
+        """
+        Description:
+        -----------
+            FitnessRanking of the pool, computed once per fitness array.
+            Assigning pool.fitness invalidates it, in-place changes of the
+            fitness array need resetRanking.
+        """
+        if self._ranking is None:
+            self._ranking = FitnessRanking(self._fitness)
+        return self._ranking
+
+    def resetRanking(self):
+        self._ranking = None
+
+    def storeState(self, state, indices=None):
+        """
+        Description:
+        -----------
+            keep the final simulation state of evaluated individuals
+        Parameters
+        ----------
+            state : dict of np.arrays
+                per individual arrays aligned with indices
+            indices : np.array of ints
+                individuals the state belongs to, default: None (all)
+        """
+        if indices is None:
+            indices = np.arange(len(self))
+        for name, values in state.items():
+            if name not in self.state:
+                self.state[name] = np.zeros(
+                    (len(self),) + np.shape(values)[1:],
+                    dtype=np.asarray(values).dtype)
+            self.state[name][indices] = values
+        self.evaluated[indices] = True
+
+    @classmethod
+    def random(cls, size, accsteps=200):
+        """
+        Description:
+        -----------
+            generate a pool of random genomes, see DNA.generateNewRandomDNA
+        Parameters
+        ----------
+            size : int
+                number of genomes
+            accsteps : int
+                length of acceleration dna, default: 200
+        """
+        genes = np.empty((size, 2, accsteps))
+        genes[:, 0] = (((np.random.uniform(-0.5, 0.5, (size, accsteps)))*10))
+        genes[:, 1] = (((np.random.uniform(0, 1, (size, accsteps)))*20))
+        return cls(genes)
+
+    @classmethod
+    def fromDNA(cls, dnas):
+        """
+        Description:
+        -----------
+            stack a list of DNA objects into a pool
+        Parameters
+        ----------
+            dnas : list of DNA
+        """
+        length = np.array([min(dna.accSteps, np.shape(dna.path)[1])
+                           for dna in dnas], dtype=int)
+        genes = np.zeros((len(dnas), 2, length.max() if len(dnas) else 0))
+        for i, dna in enumerate(dnas):
+            genes[i, :, :length[i]] = dna.path[:, :length[i]]
+        return cls(genes, length=length)
+
+    def dna(self, i):
+        """
+        Description:
+        -----------
+            DNA object of individual i, its path is a view of the pool
+        Parameters
+        ----------
+            i : int
+        Returns
+        -------
+            dna : DNA
+        """
+        dna = DNA()
+        dna.accSteps = int(self.length[i])
+        dna.path = self.genes[i, :, :dna.accSteps]
+        return dna
+
+    def toDNA(self):
+        return [self.dna(i) for i in range(len(self))]
+
+    def take(self, indices):
+        """
+        Description:
+        -----------
+            gather individuals into a new pool (copy)
+        Parameters
+        ----------
+            indices : np.array of ints
+        Returns
+        -------
+            pool : GenomePool
+        """
+        indices = np.asarray(indices, dtype=int)
+        return GenomePool(self.genes[indices], self.length[indices],
+                          self.fitness[indices], self.age[indices],
+                          self.evaluated[indices],
+                          dict((name, values[indices])
+                               for name, values in self.state.items()))
+
+    @classmethod
+    def gather(cls, pools, indices):
+        """
+        Description:
+        -----------
+            gather individuals of several pools into a new pool without
+            concatenating the pools first
+        Parameters
+        ----------
+            pools : list of GenomePool
+                pools with the same genome length
+            indices : np.array of ints
+                indices into the concatenation of the pools
+        Returns
+        -------
+            pool : GenomePool
+        """
+        indices = np.asarray(indices, dtype=int)
+        genes = np.empty((len(indices),) + np.shape(pools[0].genes)[1:])
+        length = np.empty(len(indices), dtype=int)
+        fitness = np.empty(len(indices))
+        age = np.empty(len(indices), dtype=int)
+        evaluated = np.empty(len(indices), dtype=bool)
+        state = {}
+        offset = 0
+        for pool in pools:
+            mask = (indices >= offset) & (indices < offset+len(pool))
+            local = indices[mask]-offset
+            genes[mask] = pool.genes[local]
+            length[mask] = pool.length[local]
+            fitness[mask] = pool.fitness[local]
+            age[mask] = pool.age[local]
+            evaluated[mask] = pool.evaluated[local]
+            for name, values in pool.state.items():
+                if name not in state:
+                    state[name] = np.zeros((len(indices),) + values.shape[1:],
+                                           dtype=values.dtype)
+                state[name][mask] = values[local]
+            offset += len(pool)
+        # individuals without the full state have to be simulated again
+        offset = 0
+        for pool in pools:
+            if any(name not in pool.state for name in state):
+                evaluated[(indices >= offset) &
+                          (indices < offset+len(pool))] = False
+            offset += len(pool)
+        return cls(genes, length, fitness, age, evaluated, state)
+
+    def concatenate(self, other):
+        """
+        Description:
+        -----------
+            append the individuals of another pool with the same genome length
+        Parameters
+        ----------
+            other : GenomePool
+        Returns
+        -------
+            pool : GenomePool
+        """
+        return GenomePool.gather([self, other],
+                                 np.arange(len(self)+len(other)))
@@ -0,0 +1,762 @@
+# coding: utf8
+import numpy as np
+import pygame as pg
+
+from rocketlib.population import heading_index
+from rocketlib.dna import GenomePool
+
+# movement description, identical to Rocket.update
+gravity = 9.81
+timestep = 1./2
+
+# dictonaries
+enginemodes = {0: 'step', 1: 'closed'}
+
+# per rocket state arrays of a finished simulation, see PopulationEngine.state
+stateNames = ('pos', 'curSpeed', 'dnaCounter', 'killFlag', 'trajEnd',
+              'travelDist', 'closestDist')
+
+
+def _rect_rounds():
+    """
+    Description:
+    ------------
+        check how pygame stores float coordinates in a Rect. pygame 2 rounds
+        half away from zero, pygame 1.9 truncates. Rocket.update keeps its
+        position in rect.center, so the engine has to snap the same way.
+    Returns:
+    --------
+        rounds : boolean
+    """
+    rect = pg.Rect(0, 0, 0, 0)
+    try:
+        rect.x = 0.5
+    except TypeError:
+        return False
+    return rect.x == 1
+
+
+_ROUND_RECT = _rect_rounds()
+
+
+def snap(pos):
+    """
+    Description:
+    ------------
+        snap positions to the integer grid of pygame.Rect
+    Parameters:
+    -----------
+        pos : np.array
+    Returns:
+    --------
+        snapped : np.array of floats
+    """
+    if _ROUND_RECT:
+        return np.sign(pos)*np.floor(np.abs(pos)+0.5)
+    return np.trunc(pos)
+
+
+def dna_matrix(dnas):
+    """
+    Description:
+    ------------
+        stack the acceleration paths of a list of DNA objects into one zero
+        padded array, a GenomePool is used as it is
+    Parameters:
+    -----------
+        dnas : list of DNA or GenomePool
+    Returns:
+    --------
+        path : np.array, shape (N, 2, L)
+        accSteps : np.array of ints, shape (N,)
+    """
+    if isinstance(dnas, GenomePool):
+        return dnas.genes, dnas.length
+    accSteps = np.array([min(dna.accSteps, np.shape(dna.path)[1])
+                         for dna in dnas], dtype=int)
+    length = int(accSteps.max()) if len(dnas) else 0
+    path = np.zeros((len(dnas), 2, length))
+    for i, dna in enumerate(dnas):
+        path[i, :, :accSteps[i]] = dna.path[:, :accSteps[i]]
+    return path, accSteps
+
+
+class PopulationEngine(object):
+    """
+    Description:
+    ------------
+        struct-of-arrays simulation of a whole rocket population. Positions,
+        speeds, dna counters and kill flags are numpy arrays and each call of
+        step() advances all rockets at once, following Rocket.update exactly.
+    Parameters:
+    -----------
+        dnas        : list of DNA or GenomePool
+            one DNA per rocket
+        resolution  : tuple
+            tuple of width and height of the screen
+        initialPos  : tuple
+            start position of the rockets in pygame coordinates
+        lifeTime    : int
+            number of steps the trajectory buffer is allocated for
+        snapPos     : boolean
+            snap positions to the pygame.Rect grid after every step like
+            Rocket.update, default: True
+        record      : boolean or np.array of booleans
+            rockets whose full trajectory is stored, default: True (all).
+            Travel distance, final position and closest approach to the
+            target are accumulated for all rockets, so fitness does not need
+            the trajectories.
+        target      : tuple
+            target position in pygame coordinates for the closest approach,
+            default: None (not tracked)
+        checkpointEvery : int
+            keep a copy of the state of every rocket after every
+            checkpointEvery steps, so rockets with the same first genes can
+            resume from it, default: 0 (no checkpoints)
+    """
+
+    def __init__(self, dnas, resolution, initialPos, lifeTime, snapPos=True,
+                 record=True, target=None, checkpointEvery=0):
+        self.path, self.accSteps = dna_matrix(dnas)
+        self.size = len(dnas)
+        self.resolution = resolution
+        self.initialPos = tuple(initialPos)
+        self.lifeTime = lifeTime
+        self.snapPos = snapPos
+        self.target = target
+        self.timestep = timestep
+
+        # state of the population, rect.center of every rocket is snapped
+        self.pos = np.tile(snap(np.asarray(initialPos, dtype=float)),
+                           (self.size, 1))
+        self.curSpeed = np.zeros((self.size, 2))
+        self.dnaCounter = np.zeros(self.size, dtype=int)
+        self.killFlag = np.zeros(self.size, dtype=bool)
+        self.updateCounter = 0
+
+        # preallocated trajectory buffer for the recorded rockets, the first
+        # trajLength[i] points of row recordRow[i] are valid
+        self.record = np.zeros(self.size, dtype=bool)
+        self.record[:] = record
+        self.recordRow = np.cumsum(self.record)-1
+        self.trajectories = np.empty((np.count_nonzero(self.record),
+                                      lifeTime+1, 2))
+        self.trajectories[:, 0] = initialPos
+        self.trajLength = np.ones(self.size, dtype=int)
+
+        # streaming fitness accumulators
+        self.trajEnd = np.tile(np.asarray(initialPos, dtype=float),
+                               (self.size, 1))
+        self.travelDist = np.zeros(self.size)
+        if target is None:
+            self.closestDist = None
+        else:
+            self.closestDist = np.full(self.size, np.linalg.norm(
+                np.subtract(initialPos, target)))
+
+        # positions, movement and mask of the last step (used for drawing)
+        self.lastPos = np.zeros((self.size, 2))
+        self.lastMove = np.zeros((self.size, 2))
+        self.lastActive = np.zeros(self.size, dtype=bool)
+
+        # rockets dropped from the simulation before their end, their state
+        # is not final
+        self.rejected = np.zeros(self.size, dtype=bool)
+
+        # sparse checkpoints, column c holds the state after
+        # (c+1)*checkpointEvery steps. Resumed rockets wait until the
+        # simulation reaches their start step.
+        self.checkpointEvery = checkpointEvery
+        self.checkpoints = {}
+        self.startStep = np.zeros(self.size, dtype=int)
+        if checkpointEvery > 0:
+            count = lifeTime//checkpointEvery
+            for name in stateNames:
+                array = getattr(self, name)
+                if array is not None:
+                    self.checkpoints[name] = np.zeros(
+                        (self.size, count) + array.shape[1:], dtype=array.dtype)
+
+    def step(self):
+        """
+        Description:
+        ------------
+            perform the next acceleration step of all rockets
+        Returns:
+        --------
+            alive : int
+                number of rockets which are still alive after this step
+        """
+        self.updateCounter += 1
+        active = ~self.killFlag & (self.startStep < self.updateCounter)
+        index = np.arange(self.size)
+
+        # current acceleration, rockets without further steps only fall
+        acc = np.zeros((self.size, 2))
+        fuel = active & (self.dnaCounter < self.accSteps)
+        acc[fuel] = self.path[index[fuel], :, self.dnaCounter[fuel]]
+        diff = np.empty((self.size, 2))
+        diff[:, 0] = 0.5*(-1*acc[:, 0])*self.timestep**2
+        diff[:, 1] = 0.5*(-1*acc[:, 1]+gravity)*self.timestep**2
+
+        # s = s_0 + 1/2*(a-g)*t^2 + v*t
+        newPos = self.pos + diff + self.curSpeed*self.timestep
+
+        # save trajectory history
+        if self.updateCounter >= self.trajectories.shape[1]:
+            self.trajectories = np.concatenate(
+                (self.trajectories, np.empty_like(self.trajectories)), axis=1)
+        recorded = active & self.record
+        self.trajectories[self.recordRow[recorded],
+                          self.trajLength[recorded]] = newPos[recorded]
+        self.trajLength[active] += 1
+        self.accumulate(newPos, active)
+        self.lastPos = newPos
+        self.lastMove = newPos - self.pos
+        self.lastActive = active
+
+        # collision detection, rockets reached the ground
+        crash = active & (newPos[:, 1] >= self.resolution[1])
+        self.killFlag |= crash
+
+        # updating the position and speed of all other rockets
+        move = active & ~crash
+        self.curSpeed[move] = (newPos[move] - self.pos[move])/self.timestep
+        if self.snapPos:
+            self.pos[move] = snap(newPos[move])
+        else:
+            self.pos[move] = newPos[move]
+        self.dnaCounter[move] += 1
+
+        if (self.checkpoints and
+                self.updateCounter % self.checkpointEvery == 0):
+            self.checkpoint(self.updateCounter//self.checkpointEvery - 1)
+
+        return self.countAlive()
+
+    def checkpoint(self, c, rockets=None):
+        """
+        Description:
+        ------------
+            copy the current state into checkpoint column c
+        Parameters:
+        -----------
+            c : int
+                checkpoint column
+            rockets : np.array of booleans
+                rockets to copy, default: None (all rockets which started)
+        """
+        if c >= self.checkpoints['pos'].shape[1]:
+            return
+        if rockets is None:
+            rockets = self.startStep < self.updateCounter
+        for name, checkpoints in self.checkpoints.items():
+            checkpoints[rockets, c] = getattr(self, name)[rockets]
+
+    def resume(self, checkpoints, divergence):
+        """
+        Description:
+        ------------
+            let rockets continue from the checkpoints of a parent they share
+            their first genes with. The state after step s only depends on
+            the first s genes, so a rocket resumes from the last checkpoint
+            not later than its divergence index. Call before the first step.
+        Parameters:
+        -----------
+            checkpoints : dict of np.arrays
+                checkpoints of the parent of every rocket, shape (N, C, ...)
+            divergence : np.array of ints
+                first gene index at which a rocket may differ from its
+                parent, 0 for rockets without a parent
+        """
+        if not self.checkpoints or not checkpoints:
+            return
+        count = self.checkpoints['pos'].shape[1]
+        c = np.minimum(np.asarray(divergence)//self.checkpointEvery, count)-1
+        resumed = np.flatnonzero(c >= 0)
+        c = c[resumed]
+        # the checkpoints before the resume step are shared with the parent
+        shared = np.arange(count)[None, :] <= c[:, None]
+        for name, values in checkpoints.items():
+            getattr(self, name)[resumed] = values[resumed, c]
+            own = self.checkpoints[name][resumed]
+            own[shared] = values[resumed][shared]
+            self.checkpoints[name][resumed] = own
+        self.startStep[resumed] = (c+1)*self.checkpointEvery
+        self.updateCounter = int(self.startStep.min()) if self.size else 0
+
+    def run(self, steps):
+        """
+        Description:
+        ------------
+            simulate the given number of steps, stops early if all rockets
+            are dead
+        Parameters:
+        -----------
+            steps : int
+        Returns:
+        --------
+            alive : int
+                number of rockets which are still alive
+        """
+        alive = self.countAlive()
+        for curStep in range(steps):
+            alive = self.step()
+            if alive == 0:
+                break
+        return alive
+
+    def countAlive(self):
+        return int(self.size - np.count_nonzero(self.killFlag))
+
+    def reject(self, rockets):
+        """
+        Description:
+        ------------
+            drop rockets from the active batch, they are not simulated any
+            further
+        Parameters:
+        -----------
+            rockets : np.array of booleans
+        """
+        self.rejected |= rockets & ~self.killFlag
+        self.killFlag |= rockets
+
+    def reachableBox(self):
+        """
+        Description:
+        ------------
+            bounding box of all positions a rocket can take until the end of
+            its lifetime. The remaining displacement is a weighted sum of
+            the remaining accelerations
+                s_{k+m} = s_k + m*v_k*t + sum_j (m-j+1)*d_j
+            so it is bounded by the range of the remaining genes. Snapping
+            moves the position of this engine by at most half a pixel per
+            step and does not change the speed. The corners are quadratic
+            in the number of steps m, their extremes over 0...m are found at
+            the ends or at the vertex. Crashed rockets keep their position.
+        Returns:
+        --------
+            low : np.array, shape (N, 2)
+            high : np.array, shape (N, 2)
+                corners of the box in pygame coordinates
+        """
+        if not hasattr(self, '_accLow'):
+            # range of the genes from every step on, including the zero
+            # acceleration behind the end of the dna
+            path = np.concatenate((self.path, np.zeros(
+                (self.size, 2, 1))), axis=2)
+            self._accLow = np.minimum.accumulate(path[:, :, ::-1],
+                                                 axis=2)[:, :, ::-1]
+            self._accHigh = np.maximum.accumulate(path[:, :, ::-1],
+                                                  axis=2)[:, :, ::-1]
+            self._accLow = np.minimum(self._accLow, 0)
+            self._accHigh = np.maximum(self._accHigh, 0)
+
+        index = np.arange(self.size)
+        counter = np.minimum(self.dnaCounter, self.path.shape[2])
+        accLow = self._accLow[index, :, counter]
+        accHigh = self._accHigh[index, :, counter]
+        # displacement per step d = 1/2*(g-a)*t^2
+        dLow = 0.5*(np.array([0., gravity]) - accHigh)*self.timestep**2
+        dHigh = 0.5*(np.array([0., gravity]) - accLow)*self.timestep**2
+
+        remaining = self.lifeTime - np.maximum(self.startStep,
+                                               self.updateCounter)
+        remaining = np.where(self.killFlag, 0, np.maximum(remaining, 0))
+        remaining = remaining[:, None]
+
+        def corner(d, sign):
+            # s(m) = pos + m*v*t + m*(m+1)/2*d + sign*(m+1)/2
+            a = 0.5*d
+            b = self.curSpeed*self.timestep + 0.5*d + sign*0.5
+            vertex = np.where(a != 0, -b/np.where(a != 0, 2*a, 1), 0)
+            candidates = np.stack((np.zeros_like(a), remaining+0*a,
+                                   np.floor(vertex), np.ceil(vertex)))
+            m = np.clip(candidates, 0, remaining)
+            return self.pos + a*m**2 + b*m + sign*0.5
+
+        low = corner(dLow, -1).min(axis=0)
+        high = corner(dHigh, 1).max(axis=0)
+        return low, high
+
+    def getPos(self):
+        """
+        Returns:
+        --------
+            pos : np.array, shape (N, 2)
+                current positions snapped like Rocket.getPos
+        """
+        return snap(self.pos)
+
+    def state(self):
+        """
+        Description:
+        ------------
+            final state of all rockets, enough to restore the fitness
+            relevant state without simulating again (trajectories excluded)
+        Returns:
+        --------
+            state : dict of np.arrays
+                per rocket arrays, see stateNames. Checkpoints are added with
+                the prefix 'cp_'.
+        """
+        state = dict((name, np.copy(getattr(self, name)))
+                     for name in stateNames
+                     if getattr(self, name) is not None)
+        if self.checkpoints and self.checkpointEvery > 0:
+            count = self.checkpoints['pos'].shape[1]
+            if (self.countAlive() > 0 and
+                    self.updateCounter < count*self.checkpointEvery):
+                # unfinished simulation, later checkpoints are unknown
+                return state
+            # all rockets crashed, their state does not change anymore
+            for c in range(self.updateCounter//self.checkpointEvery, count):
+                self.checkpoint(c, np.ones(self.size, dtype=bool))
+        for name, checkpoints in self.checkpoints.items():
+            state['cp_' + name] = np.copy(checkpoints)
+        return state
+
+    def restore(self, indices, state):
+        """
+        Description:
+        ------------
+            overwrite the state of some rockets with a state of a former
+            simulation, their trajectories only contain the start point
+        Parameters:
+        -----------
+            indices : np.array of ints
+                indices of the rockets
+            state : dict of np.arrays
+                per rocket arrays aligned with indices, see state()
+        """
+        for name, values in state.items():
+            if name.startswith('cp_'):
+                name = name[3:]
+                if name not in self.checkpoints:
+                    self.checkpoints[name] = np.zeros(
+                        (self.size,) + np.shape(values)[1:],
+                        dtype=np.asarray(values).dtype)
+                self.checkpoints[name][indices] = values
+                continue
+            array = getattr(self, name)
+            if array is not None:
+                array[indices] = values
+        self.trajLength[indices] = 1
+
+    def accumulate(self, newPos, active):
+        """
+        Description:
+        ------------
+            update travel distance and closest approach with the new
+            trajectory points of the active rockets
+        Parameters:
+        -----------
+            newPos : np.array, shape (N, 2)
+            active : np.array of booleans, shape (N,)
+        """
+        newPos = newPos[active]
+        self.travelDist[active] += np.linalg.norm(
+            newPos - self.trajEnd[active], axis=1)
+        self.trajEnd[active] = newPos
+        if self.closestDist is not None:
+            self.closestDist[active] = np.minimum(
+                self.closestDist[active],
+                np.linalg.norm(newPos - self.target, axis=1))
+
+    def trajectory(self, i):
+        """
+        Description:
+        ------------
+            trajectory of rocket i
+        Parameters:
+        -----------
+            i : int
+                index of the rocket
+        Returns:
+        --------
+            trajectory : np.array, shape (trajLength[i], 2)
+                view of the trajectory buffer, None if rocket i is not
+                recorded
+        """
+        if not self.record[i]:
+            return None
+        return self.trajectories[self.recordRow[i], :self.trajLength[i]]
+
+    def export(self, filename):
+        """
+        Description:
+        ------------
+            save the trajectories of all recorded rockets to a .npz file
+        Parameters:
+        -----------
+            filename : string
+        """
+        length = self.trajLength[self.record]
+        np.savez(filename,
+                 trajectories=self.trajectories[:, :length.max()],
+                 trajLength=length)
+
+    def headings(self):
+        """
+        Description:
+        ------------
+            rotation angles of all rockets based on their last movement,
+            vectorized version of Rocket.get_rotangle
+        Returns:
+        --------
+            angles : np.array, shape (N,)
+                rotation angles in degree
+        """
+        angle = np.degrees(np.arctan2(-self.lastMove[:, 1],
+                                      -self.lastMove[:, 0]))
+        return -angle+90
+
+    def syncStep(self, rockets):
+        """
+        Description:
+        ------------
+            apply the last step to the rocket sprites, rotate them and extend
+            their trajectories (only needed for drawing)
+        Parameters:
+        -----------
+            rockets : list of Rocket
+                rockets in the order of the dna list of the engine
+        """
+        active = np.flatnonzero(self.lastActive)
+        if len(active) == 0:
+            return
+        index = heading_index(self.headings()[active], len(rockets[0].atlas))
+        for i, heading in zip(active, index):
+            rocket = rockets[i]
+            rocket.rot_atlas(heading)
+            rocket.trajectory = self.trajectory(i)
+            self.syncRocket(rocket, i)
+
+    def syncRocket(self, rocket, i):
+        """
+        Description:
+        ------------
+            write the state of rocket i back to a Rocket
+        Parameters:
+        -----------
+            rocket : Rocket or RocketData
+            i : int
+                index of the rocket
+        """
+        center = snap(self.pos[i])
+        rocket.setPos((int(center[0]), int(center[1])))
+        rocket.curSpeed = tuple(self.curSpeed[i])
+        rocket.dnaCounter = int(self.dnaCounter[i])
+        rocket.killFlag = bool(self.killFlag[i])
+        rocket.updateCounter = self.updateCounter
+        rocket.travelDist = self.travelDist[i]
+        if self.closestDist is not None:
+            rocket.closestDist = self.closestDist[i]
+
+    def apply(self, rockets):
+        """
+        Description:
+        ------------
+            write the full state including trajectories back to the rockets
+        Parameters:
+        -----------
+            rockets : list of Rocket or RocketData
+                rockets in the order of the dna list of the engine
+        """
+        for i, rocket in enumerate(rockets):
+            self.syncRocket(rocket, i)
+            rocket.trajectory = self.trajectory(i)
+
+
+class ClosedFormEngine(PopulationEngine):
+    """
+    Description:
+    ------------
+        evaluates the whole lifetime of all rockets at once. Without the
+        pixel snapping of pygame.Rect the motion model of Rocket.update is a
+        linear recurrence in the dna accelerations:
+            v_k = v_{k-1} + d_k/t           --> v = cumsum(d)/t
+            s_k = s_{k-1} + d_k + v_{k-1}*t --> s = s_0 + cumsum(cumsum(d))
+        with d_k = 1/2*(g-a_k)*t^2. The ground collision is found with a
+        vectorized search and all later steps are masked.
+        Results equal PopulationEngine(snapPos=False) up to float rounding.
+        This is a different physics model than the snapped engine which
+        calcFitness scores: the Rect rounding can move the ground collision
+        to another step, so the crash, the final position and the fitness
+        of a rocket can differ by far more than the rounding itself.
+        step() only moves a cursor through the precomputed trajectories, so
+        the engine can be used for drawing as well.
+    Parameters:
+    -----------
+        dnas        : list of DNA or GenomePool
+            one DNA per rocket
+        resolution  : tuple
+            tuple of width and height of the screen
+        initialPos  : tuple
+            start position of the rockets in pygame coordinates
+        lifeTime    : int
+            number of steps to evaluate
+        target      : tuple
+            target position in pygame coordinates for the closest approach,
+            default: None (not tracked)
+    """
+
+    def __init__(self, dnas, resolution, initialPos, lifeTime, target=None):
+        # the prefix sums need the trajectories of all rockets anyway
+        PopulationEngine.__init__(self, dnas, resolution, initialPos,
+                                  lifeTime, snapPos=False, target=target)
+        startPos = self.pos.copy()
+
+        # acceleration of every step, the dna matrix is zero padded, so
+        # rockets without further steps only fall
+        acc = np.zeros((self.size, lifeTime, 2))
+        n = min(self.path.shape[2], lifeTime)
+        acc[:, :n, :] = np.transpose(self.path[:, :, :n], (0, 2, 1))
+        diff = 0.5*(-1*acc + np.array([0., gravity]))*timestep**2
+
+        # prefix sums of the linear recurrence
+        speedSum = np.cumsum(diff, axis=1)
+        self.speeds = speedSum/timestep
+        self.trajectories[:, 1:] = startPos[:, None, :] + np.cumsum(speedSum,
+                                                                   axis=1)
+        self.positions = self.trajectories[:, 1:]
+
+        # index of the step in which a rocket reaches the ground
+        ground = self.positions[:, :, 1] >= self.resolution[1]
+        self.crashStep = np.where(ground.any(axis=1), ground.argmax(axis=1),
+                                  lifeTime)
+
+        # travel distance and closest approach as prefix sum and prefix
+        # minimum along the trajectories
+        segments = np.linalg.norm(np.diff(self.trajectories, axis=1), axis=2)
+        self.travelSum = np.cumsum(segments, axis=1)
+        if target is not None:
+            self.closestMin = np.minimum.accumulate(np.linalg.norm(
+                self.trajectories - np.asarray(target), axis=2), axis=1)
+
+        self.startPos = startPos
+        self.finalPos = self.stateAt(lifeTime)
+        self.stateAt(0)
+
+    def stateAt(self, steps):
+        """
+        Description:
+        ------------
+            set the engine state to the state after the given number of steps
+        Parameters:
+        -----------
+            steps : int
+        Returns:
+        --------
+            pos : np.array, shape (N, 2)
+                positions after the given number of steps
+        """
+        steps = min(steps, self.lifeTime)
+        self.updateCounter = steps
+        self.killFlag = self.crashStep < steps
+        moved = np.minimum(steps, self.crashStep)
+        index = np.arange(self.size)
+        self.pos = np.where(moved[:, None] > 0,
+                            self.positions[index, moved-1], self.startPos)
+        self.curSpeed = np.where(moved[:, None] > 0,
+                                 self.speeds[index, moved-1], 0.)
+        self.dnaCounter = moved
+        self.trajLength = np.minimum(steps, self.crashStep+1)+1
+        self.travelDist = np.where(self.trajLength > 1,
+                                   self.travelSum[index, self.trajLength-2], 0.)
+        if self.closestDist is not None:
+            self.closestDist = self.closestMin[index, self.trajLength-1]
+        return self.pos
+
+    def step(self):
+        steps = self.updateCounter+1
+        if steps <= self.lifeTime:
+            self.lastActive = self.crashStep >= steps-1
+            self.lastPos = self.positions[:, steps-1]
+            self.lastMove = self.lastPos - self.pos
+        else:
+            self.lastActive = np.zeros(self.size, dtype=bool)
+        self.stateAt(steps)
+        return self.countAlive()
+
+    def run(self, steps):
+        self.stateAt(min(self.updateCounter+steps, self.lifeTime))
+        return self.countAlive()
+
+
+class CoarseEngine(PopulationEngine):
+    """
+    Description:
+    ------------
+        low fidelity simulation for screening. Every factor consecutive dna
+        accelerations are averaged into one step with a factor times larger
+        timestep, so the lifetime takes factor times fewer steps. Speeds
+        grow like in the exact model, positions differ by the coarser
+        integration and the missing pixel snapping.
+    Parameters:
+    -----------
+        dnas        : list of DNA or GenomePool
+            one DNA per rocket
+        resolution  : tuple
+            tuple of width and height of the screen
+        initialPos  : tuple
+            start position of the rockets in pygame coordinates
+        lifeTime    : int
+            number of exact steps to cover
+        factor      : int
+            number of exact steps merged into one coarse step, default: 4
+        target      : tuple
+            target position in pygame coordinates for the closest approach,
+            default: None (not tracked)
+    """
+
+    def __init__(self, dnas, resolution, initialPos, lifeTime, factor=4,
+                 target=None):
+        path, accSteps = dna_matrix(dnas)
+        size, length = len(path), np.shape(path)[2]
+        blocks = -(-length//factor)
+        padded = np.zeros((size, 2, blocks*factor))
+        padded[:, :, :length] = path
+        coarse = padded.reshape(size, 2, blocks, factor).mean(axis=3)
+        PopulationEngine.__init__(
+            self, GenomePool(coarse, length=-(-accSteps//factor)), resolution,
+            initialPos, lifeTime//factor, snapPos=False, record=False,
+            target=target)
+        self.factor = factor
+        self.timestep = factor*timestep
+
+
+def create_engine(mode, dnas, resolution, initialPos, lifeTime, record=True,
+                  target=None, checkpointEvery=0):
+    """
+    Description:
+    ------------
+        create the simulation engine for a population
+    Parameters:
+    -----------
+        mode        : str
+            'step'   : PopulationEngine, step by step simulation
+            'closed' : ClosedFormEngine, closed-form whole lifetime evaluation
+        dnas        : list of DNA or GenomePool
+        resolution  : tuple
+        initialPos  : tuple
+        lifeTime    : int
+        record      : boolean or np.array of booleans
+            rockets whose full trajectory is stored, only used by 'step'
+        target      : tuple
+            target position for the closest approach
+        checkpointEvery : int
+            checkpoint interval of the state, only used by 'step'
+    Returns:
+    --------
+        engine : PopulationEngine
+    """
+    if mode == enginemodes.get(0):
+        return PopulationEngine(dnas, resolution, initialPos, lifeTime,
+                                record=record, target=target,
+                                checkpointEvery=checkpointEvery)
+    elif mode == enginemodes.get(1):
+        return ClosedFormEngine(dnas, resolution, initialPos, lifeTime,
+                                target=target)
+    raise ValueError("unknown engine mode %s" % mode)
@@ -0,0 +1,263 @@
+# coding: utf8
+import multiprocessing as mp
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+import rocketlib.engine as engine
+import rocketlib.fitness as fitness
+from rocketlib.dna import GenomePool
+
+# dictonaries
+executormodes = {0: 'serial', 1: 'thread', 2: 'process', 3: 'tcp'}
+
+
+def run_pruned(sim, params, threshold):
+    """
+    Description:
+    ------------
+        simulate until the end of the lifetime and reject rockets whose
+        optimistic fitness falls below the threshold. Rockets are checked
+        after every multiple of pruneEvery steps once they started, so the
+        checks do not depend on the other rockets of the batch.
+    Parameters:
+    -----------
+        sim         : PopulationEngine
+        params      : dict
+            world parameters, see simulate_chunk
+        threshold   : float
+    """
+    lifeTime = params['lifeTime']
+    every = params['pruneEvery']
+    while sim.updateCounter < lifeTime and sim.countAlive() > 0:
+        if sim.updateCounter % every == 0:
+            low, high = sim.reachableBox()
+            bound = fitness.fitnessUpperBound(
+                low, high, sim.travelDist, params['initialPos'],
+                params['target'], params['resolution'][1],
+                params['target_weight'], params['travel_weight'])
+            sim.reject((bound < threshold) &
+                       (sim.startStep <= sim.updateCounter))
+        sim.run(min(every - sim.updateCounter % every,
+                    lifeTime - sim.updateCounter))
+
+
+def simulate_chunk(params, genes, length, checkpoints=None, divergence=None,
+                   threshold=None):
+    """
+    Description:
+    ------------
+        simulate a batch of genomes until the end of their lifetime
+    Parameters:
+    -----------
+        params      : dict
+            world parameters: engine, resolution, initialPos, lifeTime,
+            target, checkpointEvery, pruneEvery, target_weight and
+            travel_weight
+        genes       : np.array, shape (N, 2, L)
+        length      : np.array of ints, shape (N,)
+        checkpoints : dict of np.arrays
+            checkpoints of the origin parent of every genome, shape
+            (N, C, ...), default: None (start at step 0)
+        divergence  : np.array of ints
+            first gene index at which a genome may differ from its origin
+        threshold   : float
+            admission threshold of run_pruned, default: None (no pruning)
+    Returns:
+    --------
+        state : dict of np.arrays
+            final state of the genomes, see PopulationEngine.state
+        rejected : np.array of booleans
+            genomes dropped by pruning, their state is not final
+    """
+    sim = engine.create_engine(params['engine'], GenomePool(genes, length),
+                               params['resolution'], params['initialPos'],
+                               params['lifeTime'], record=False,
+                               target=params['target'],
+                               checkpointEvery=params['checkpointEvery'])
+    if checkpoints:
+        sim.resume(checkpoints, divergence)
+    if threshold is None:
+        sim.run(params['lifeTime'] - sim.updateCounter)
+    else:
+        run_pruned(sim, params, threshold)
+    return sim.state(), sim.rejected
+
+
+# genome buffer of a worker process, shared with the main process
+_sharedGenes = None
+
+
+def _init_worker(buffer):
+    global _sharedGenes
+    _sharedGenes = buffer
+
+
+def _simulate_shared(task):
+    """ simulate_chunk of rows lo:hi of the shared genome buffer """
+    params, shape, lo, hi, length, checkpoints, divergence, threshold = task
+    genes = np.frombuffer(_sharedGenes, count=int(np.prod(shape))
+                          ).reshape(shape)[lo:hi]
+    return simulate_chunk(params, genes, length, checkpoints, divergence,
+                          threshold)
+
+
+class EvaluationExecutor(object):
+    """
+    Description:
+    ------------
+        runs the simulation of a genome pool in chunks on a serial, thread
+        pool or process pool backend. Process workers read the genomes from
+        a shared memory buffer, only indices, world parameters and the
+        checkpoints of the chunk are sent to them. Every rocket is simulated
+        independently, so results do not depend on the backend, the number
+        of workers or the chunk size.
+    Parameters:
+    -----------
+        mode        : str
+            'serial'  : simulate in the calling thread
+            'thread'  : multiprocessing.pool.ThreadPool
+            'process' : multiprocessing.Pool with shared genomes
+            'tcp'     : TCP workers of a distributed.Coordinator
+        workers     : int
+            number of threads or processes, default: None (number of cpus)
+        chunkSize   : int
+            genomes per chunk, default: None (one chunk per worker)
+        address     : tuple
+            host and port the coordinator of 'tcp' listens on, default:
+            None (distributed.defaultAddress)
+        timeout     : float
+            seconds a 'tcp' worker may take for one chunk before it is
+            given to another worker, default: None (no limit)
+        wait        : float
+            seconds to wait for all chunks of a pool on 'tcp' workers,
+            default: None (no limit)
+    """
+
+    def __init__(self, mode='serial', workers=None, chunkSize=None,
+                 address=None, timeout=None, wait=None):
+        if mode not in executormodes.values():
+            raise ValueError("unknown executor mode %s" % mode)
+        self.mode = mode
+        if mode == executormodes.get(0):
+            workers = 1
+        self.workers = workers or mp.cpu_count()
+        self.chunkSize = chunkSize
+        self._pool = None
+        self._buffer = None
+        if mode == executormodes.get(3):
+            # workers connect on their own, the coordinator listens from now
+            from rocketlib.distributed import Coordinator, defaultAddress
+            self._pool = Coordinator(address or defaultAddress, chunkSize,
+                                     timeout, wait)
+
+    @property
+    def parallel(self):
+        return self.mode != executormodes.get(0)
+
+    def waitForWorkers(self, count=1, wait=None):
+        """ wait until count 'tcp' workers are connected, see Coordinator """
+        if self.mode != executormodes.get(3):
+            return True
+        return self._pool.waitForWorkers(count, wait)
+
+    def chunks(self, size):
+        """
+        Returns:
+        --------
+            bounds : list of tuples
+                start and stop index of every chunk
+        """
+        chunkSize = self.chunkSize or -(-size//self.workers)
+        chunkSize = max(chunkSize, 1)
+        return [(lo, min(lo+chunkSize, size))
+                for lo in range(0, size, chunkSize)]
+
+    def simulate(self, params, pool, checkpoints=None, divergence=None,
+                 threshold=None):
+        """
+        Description:
+        ------------
+            simulate all genomes of a pool, see simulate_chunk
+        Parameters:
+        -----------
+            params      : dict
+                world parameters, see simulate_chunk
+            pool        : GenomePool
+            checkpoints : dict of np.arrays
+                checkpoints of the origin parent of every genome
+            divergence  : np.array of ints
+            threshold   : float
+        Returns:
+        --------
+            state : dict of np.arrays
+            rejected : np.array of booleans
+        """
+        if self.mode == executormodes.get(3):
+            return self._pool.simulate(params, pool, checkpoints, divergence,
+                                       threshold)
+        bounds = self.chunks(len(pool))
+        if len(bounds) <= 1 or not self.parallel:
+            return simulate_chunk(params, pool.genes, pool.length,
+                                  checkpoints, divergence, threshold)
+
+        def part(lo, hi):
+            if not checkpoints:
+                return None, None
+            return (dict((name, values[lo:hi])
+                         for name, values in checkpoints.items()),
+                    divergence[lo:hi])
+
+        if self.mode == executormodes.get(1):
+            if self._pool is None:
+                self._pool = ThreadPool(self.workers)
+            results = self._pool.starmap(simulate_chunk, [
+                (params, pool.genes[lo:hi], pool.length[lo:hi]) +
+                part(lo, hi) + (threshold,) for lo, hi in bounds])
+        else:
+            genes = self.share(pool.genes)
+            results = self._pool.map(_simulate_shared, [
+                (params, genes.shape, lo, hi, pool.length[lo:hi]) +
+                part(lo, hi) + (threshold,) for lo, hi in bounds])
+
+        state = {}
+        for name in results[0][0]:
+            state[name] = np.concatenate([result[0][name]
+                                          for result in results])
+        rejected = np.concatenate([result[1] for result in results])
+        return state, rejected
+
+    def share(self, genes):
+        """
+        Description:
+        ------------
+            copy genomes into the shared buffer of the worker processes. The
+            process pool is (re)started if the buffer is too small.
+        Parameters:
+        -----------
+            genes : np.array, shape (N, 2, L)
+        Returns:
+        --------
+            genes : np.array
+                view of the shared buffer with the copied genomes
+        """
+        if self._buffer is None or len(self._buffer) < genes.size:
+            self.close()
+            self._buffer = mp.RawArray('d', max(genes.size, 1))
+            self._pool = mp.Pool(self.workers, initializer=_init_worker,
+                                 initargs=(self._buffer,))
+        shared = np.frombuffer(self._buffer, count=genes.size
+                               ).reshape(genes.shape)
+        shared[:] = genes
+        return shared
+
+    def close(self):
+        """ stop the worker threads, processes or TCP workers """
+        if self.mode == executormodes.get(3):
+            self._pool.close()
+            return
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        self._buffer = None
@@ -16,28 +16,64 @@ def calcFitness(world, population):
         avg_fitness : float
                 average fitness of the population
     """
+    rockets = list(population)
 
-    # initalising
-    target_pos = ut.from_pygame(world.target, world.height)
-    rocket_finalpos = np.zeros((len(population), 2))
-    rocket_traveldist = np.zeros((len(population), 1))
-    start_pos = np.array([0, 0])
+    # get final rocket positions and travel distances
+    rocket_finalpos = np.array([rocket.getPos() for rocket in rockets],
+                               dtype=float)
+    # use the travel distance streamed by the simulation engine, otherwise
+    # sum up the euclidian distances between consecutive trajectory points
+    rocket_traveldist = np.array([
+        rocket.travelDist if rocket.travelDist is not None else
+        np.sum(np.linalg.norm(np.diff(rocket.trajectory, axis=0), axis=1))
+        for rocket in rockets])
 
-    # get rocket positions and calulate euclidian distances
-    for i, rocket in enumerate(population):
-        # get start position
-        if i == 0:
-            start_pos[0] = np.asarray(ut.from_pygame(
-                rocket.trajectory[0], world.height))[0]
+    fitness_values, avg_fitness, max_fitness = calcFitnessArrays(
+        rocket_finalpos, rocket_traveldist, rockets[0].getInitialPos(),
+        world.target, world.height, world.travel_weight, world.travel_weight)
 
-        # get final rocket positions
-        rocket_finalpos[i] = np.asarray(
-            ut.from_pygame(rocket.getPos(), world.height))
+    world.maxfitness = max_fitness
+
+    # update fitness score of rockets
+    for rocket, value in zip(rockets, fitness_values):
+        rocket.fitness = value
+
+    return avg_fitness
 
-        # calculate the euclidian distances between consecutive trajectory
-        # points and sum up to get total travel distance for each rocket
-        rocket_traveldist[i] = np.sum(np.linalg.norm(
-            np.diff(rocket.trajectory, axis=0), axis=1))
+
+def calcFitnessArrays(finalpos, traveldist, start, target, height,
+                      target_weight, travel_weight):
+    """
+    Description:
+        calculate fitness of a whole population from arrays
+    Paramterers:
+    ------------
+        finalpos    : np.array, shape (N, 2)
+                final rocket positions in pygame coordinates
+        traveldist  : np.array, shape (N,)
+                total travel distances
+        start       : tuple
+                start position in pygame coordinates
+        target      : tuple
+                target position in pygame coordinates
+        height      : int
+                screen height
+        target_weight: int or float
+        travel_weight: int or float
+    Returns:
+    --------
+        fitness_values : np.array, shape (N,)
+        avg_fitness : float
+                average fitness of the population
+        max_fitness : float
+                maximum fitness of the population
+    """
+    # transform from pygame coordinates, see ut.from_pygame
+    target_pos = np.asarray(ut.from_pygame(target, height))
+    rocket_finalpos = np.trunc(np.column_stack(
+        (finalpos[:, 0], height - finalpos[:, 1])))
+    # start position on ground level
+    start_pos = np.array([ut.from_pygame(start, height)[0], 0])
 
     # min distance between start and target
     min_path = np.linalg.norm(target_pos-start_pos)
@@ -48,23 +84,112 @@ def calcFitness(world, population):
         np.interp(rocket_targetdist, [0, min_path], [-10, -1]))
 
     # calculate travel score from deviation from minpath
-    delta = np.abs(rocket_traveldist-min_path)
-    travel_score = np.abs(np.interp(delta[:, 0], [0, min_path], [-10, -1]))
+    delta = np.abs(np.ravel(traveldist)-min_path)
+    travel_score = np.abs(np.interp(delta, [0, min_path], [-10, -1]))
 
     fitness_values = score_to_fitness(
-        target_score, travel_score, world.travel_weight, world.travel_weight)
+        target_score, travel_score, target_weight, travel_weight)
 
-    world.maxfitness = max(fitness_values)
-    total_fitness = 0
+    return fitness_values, np.mean(fitness_values), np.max(fitness_values)
 
-    # update fitness score of rockets
-    for i, rocket in enumerate(population):
-        rocket.fitness = fitness_values[i]
-        total_fitness += fitness_values[i]
 
-    # average fitness
-    avg_fitness = total_fitness/len(population)
-    return avg_fitness
+def fitnessUpperBound(low, high, traveldist, start, target, height,
+                      target_weight, travel_weight):
+    """
+    Description:
+        optimistic fitness of rockets whose final position lies in a box
+        and whose travel distance can only grow, see calcFitnessArrays
+    Paramterers:
+    ------------
+        low, high   : np.array, shape (N, 2)
+                corners of the box of final positions in pygame coordinates
+        traveldist  : np.array, shape (N,)
+                travel distances so far
+        start       : tuple
+                start position in pygame coordinates
+        target      : tuple
+                target position in pygame coordinates
+        height      : int
+                screen height
+        target_weight: int or float
+        travel_weight: int or float
+    Returns:
+    --------
+        bound : np.array, shape (N,)
+                no final fitness can exceed the bound
+    """
+    target_pos = np.asarray(ut.from_pygame(target, height))
+    start_pos = np.array([ut.from_pygame(start, height)[0], 0])
+    min_path = np.linalg.norm(target_pos-start_pos)
+
+    # box in fitness coordinates, widened by one for the truncation
+    box_low = np.column_stack((low[:, 0], height - high[:, 1])) - 1
+    box_high = np.column_stack((high[:, 0], height - low[:, 1])) + 1
+    nearest = np.clip(target_pos, box_low, box_high)
+    rocket_targetdist = np.linalg.norm(nearest-target_pos, axis=1)
+    target_score = np.abs(
+        np.interp(rocket_targetdist, [0, min_path], [-10, -1]))
+
+    # the deviation from minpath can still reach zero, as long as the travel
+    # distance is shorter
+    delta = np.maximum(np.ravel(traveldist)-min_path, 0)
+    travel_score = np.abs(np.interp(delta, [0, min_path], [-10, -1]))
+
+    return score_to_fitness(target_score, travel_score, target_weight,
+                            travel_weight)
+
+
+def rankCorrelation(a, b):
+    """
+    Description:
+        Spearman rank correlation of two fitness arrays in O(N log N), tied
+        values get their average rank, non finite values are left out
+    Paramterers:
+    ------------
+        a, b : np.array, shape (N,)
+                two fitness values of the same individuals
+    Returns:
+    --------
+        correlation : float
+                1 for identical rankings, -1 for reversed rankings, NaN if
+                there are less than two values or one ranking is constant
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    finite = np.isfinite(a) & np.isfinite(b)
+    if np.count_nonzero(finite) < 2:
+        return np.nan
+    ranks = []
+    for values in (a[finite], b[finite]):
+        order = np.argsort(values, kind='mergesort')
+        unique, first, inverse, counts = np.unique(
+            values[order], return_index=True, return_inverse=True,
+            return_counts=True)
+        rank = np.empty(len(values))
+        rank[order] = (first + 0.5*(counts-1))[inverse]
+        ranks.append(rank - rank.mean())
+    norm = np.sqrt(np.sum(ranks[0]**2)*np.sum(ranks[1]**2))
+    if norm == 0:
+        return np.nan
+    return np.sum(ranks[0]*ranks[1])/norm
+
+
+def travelDistances(trajectories, trajLength):
+    """
+    Description:
+        total travel distances from a block of trajectories
+    Paramterers:
+    ------------
+        trajectories : np.array, shape (N, T, 2)
+        trajLength   : np.array of ints, shape (N,)
+                number of valid points of each trajectory
+    Returns:
+    --------
+        traveldist : np.array, shape (N,)
+    """
+    segments = np.linalg.norm(np.diff(trajectories, axis=1), axis=2)
+    valid = np.arange(segments.shape[1])[None, :] < (trajLength[:, None]-1)
+    return np.sum(np.where(valid, segments, 0.), axis=1)
 
 
 def score_to_fitness(target_score, travel_score, target_weight, travel_weight):
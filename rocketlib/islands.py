@@ -0,0 +1,241 @@
+# coding: utf8
+import random
+import multiprocessing as mp
+
+import numpy as np
+
+# dictonaries
+topologymodes = {0: 'ring', 1: 'random'}
+
+
+def _island(conn, seed, args, kwargs):
+    """
+    Description:
+    ------------
+        worker process of one island, a headless RocketWorld which evolves
+        on request of the IslandModel
+    Parameters:
+    -----------
+        conn    : multiprocessing.Connection
+            commands ('run', generations), ('emigrate', count),
+            ('immigrate', pool) and ('stop', None)
+        seed    : int
+            seed of the random generators of the island
+        args    : tuple
+            positional arguments of RocketWorld
+        kwargs  : dict
+            keyword arguments of RocketWorld
+    """
+    from rocketlib.world import RocketWorld
+
+    np.random.seed(seed)
+    random.seed(seed)
+    world = RocketWorld(*args, **kwargs)
+    world.createInitialGen()
+    evaluated = False
+    try:
+        while True:
+            command, arg = conn.recv()
+            if command == 'run':
+                stats = []
+                for generation in range(arg):
+                    if evaluated:
+                        world.createNewGen()
+                    af = world.evaluateGeneration()
+                    evaluated = True
+                    stats.append((world.generation, world.maxfitness, af))
+                conn.send(stats)
+            elif command == 'emigrate':
+                conn.send(world.emigrants(arg))
+            elif command == 'immigrate':
+                world.immigrate(arg)
+            elif command == 'stop':
+                conn.send(world.emigrants(1))
+                conn.close()
+                return
+    finally:
+        # worker threads and processes are stopped on errors as well
+        world.executor.close()
+
+
+class IslandModel(object):
+    """
+    Description:
+    ------------
+        island model of several rocket worlds. Every island evolves its own
+        population with its own modes in a separate process. Every
+        migrationInterval generations the best individuals of every island
+        replace the worst individuals of its neighbour.
+    Parameters:
+    -----------
+        islands             : list of lists
+            modes of every island, see RocketWorld
+        populationSize      : int
+            population size of every island
+        resolution          : tupel (width, height)
+        lifeTime            : int
+        target              : tupel
+        generations         : int
+            number of generations, default: 50
+        migrationInterval   : int
+            generations between two migrations, default: 5
+        migrants            : int
+            number of individuals every island sends, default: 2
+        topology            : str
+            'ring'   : island i sends to island i+1
+            'random' : every island sends to a random other island
+        seed                : int
+            seed of the islands and of the random topology, island i uses
+            seed+i, default: 0
+        **kwargs
+            further keyword arguments of all island RocketWorlds
+    """
+
+    def __init__(self, islands, populationSize, resolution, lifeTime,
+                 target=(640, 100), generations=50, migrationInterval=5,
+                 migrants=2, topology='ring', seed=0, **kwargs):
+        if topology not in topologymodes.values():
+            raise ValueError("unknown topology %s" % topology)
+        self.islands = islands
+        self.populationSize = populationSize
+        self.resolution = resolution
+        self.lifeTime = lifeTime
+        self.target = target
+        self.generations = generations
+        self.migrationInterval = migrationInterval
+        self.migrants = migrants
+        self.topology = topology
+        self.seed = seed
+        self.kwargs = kwargs
+        self.kwargs['headless'] = True
+        self.__random = np.random.RandomState(seed)
+
+        # best fitness of every island per generation and the best
+        # individual of all islands after the run
+        self.history = np.zeros((0, len(islands)))
+        self.best = None
+
+    def destinations(self):
+        """
+        Returns:
+        --------
+            destinations : np.array of ints
+                island every island sends its migrants to
+        """
+        count = len(self.islands)
+        if self.topology == topologymodes.get(0):
+            return (np.arange(count) + 1) % count
+        # random other island
+        shift = self.__random.randint(1, max(count, 2), count)
+        return (np.arange(count) + shift) % count
+
+    def receive(self, connections, processes, i):
+        """
+        Description:
+        ------------
+            wait for the answer of island i
+        Parameters:
+        -----------
+            connections : list of multiprocessing.Connection
+            processes   : list of multiprocessing.Process
+            i           : int
+        Returns:
+        --------
+            answer : object
+        Raises:
+        -------
+            RuntimeError
+                if the island process died
+        """
+        conn, process = connections[i], processes[i]
+        try:
+            while not conn.poll(1.):
+                if not process.is_alive():
+                    raise EOFError
+            return conn.recv()
+        except (EOFError, OSError):
+            process.join()
+            raise RuntimeError("island %s stopped with exit code %s" %
+                               (i, process.exitcode))
+
+    def migrate(self, connections, processes):
+        """
+        Description:
+        ------------
+            send the best individuals of every island to their destination
+        Parameters:
+        -----------
+            connections : list of multiprocessing.Connection
+            processes   : list of multiprocessing.Process
+        """
+        for conn in connections:
+            conn.send(('emigrate', self.migrants))
+        emigrants = [self.receive(connections, processes, i)
+                     for i in range(len(connections))]
+        for source, destination in enumerate(self.destinations()):
+            if destination != source:
+                connections[destination].send(('immigrate',
+                                               emigrants[source]))
+
+    def run(self):
+        """
+        Description:
+        ------------
+            evolve all islands and report the best fitness of every island
+            and of all islands per generation
+        Returns:
+        --------
+            best : GenomePool
+                best individual of all islands with its fitness
+        """
+        connections = []
+        processes = []
+        for i, modes in enumerate(self.islands):
+            kwargs = dict(self.kwargs, modes=modes)
+            args = (self.populationSize, self.resolution, self.lifeTime,
+                    self.target)
+            conn, child = mp.Pipe()
+            process = mp.Process(target=_island,
+                                 args=(child, self.seed + i, args, kwargs))
+            process.start()
+            # only the island holds the child end, so its death ends recv
+            child.close()
+            connections.append(conn)
+            processes.append(process)
+
+        try:
+            done = 0
+            while done < self.generations:
+                count = min(self.migrationInterval, self.generations - done)
+                for conn in connections:
+                    conn.send(('run', count))
+                stats = [self.receive(connections, processes, i)
+                         for i in range(len(connections))]
+                for g in range(count):
+                    best = np.array([island[g][1] for island in stats])
+                    self.history = np.vstack((self.history, best))
+                    print("Generation %s: Island Max Fitness: %s, "
+                          "Global Max Fitness: %s" % (
+                              stats[0][g][0], np.round(best).tolist(),
+                              round(best.max())))
+                done += count
+                if done < self.generations and len(connections) > 1:
+                    self.migrate(connections, processes)
+
+            for conn in connections:
+                conn.send(('stop', None))
+            finalists = [self.receive(connections, processes, i)
+                         for i in range(len(connections))]
+        except BaseException:
+            for process in processes:
+                process.terminate()
+            raise
+        finally:
+            for process in processes:
+                process.join()
+
+        winner = int(np.argmax([pool.fitness[0] for pool in finalists]))
+        self.best = finalists[winner]
+        print("Best Island: %s, Max Fitness: %s" % (
+            winner, round(self.best.fitness[0])))
+        return self.best
@@ -3,7 +3,7 @@ import numpy as np
 #from world import RocketWorld
 
 mode2title = {'lin': 'Rank Lin.', 'exp': 'Rank Exp.', 'by_value': 'Fitness Barrier',
-            'fps': 'Fitness Proportional', '1pt': '1Point',
+            'fps': 'Fitness Proportional', 'tour': 'Tournament', '1pt': '1Point',
             'full': 'Full', 'npt': 'npoint',
             'arith': 'Simple Arithmetic', '1gen': 'Age-Based 1 Generation',
             'rpl': 'Replace worst'}
@@ -19,9 +19,15 @@ class AverageFitness():
         rworld : RocketWorld
         title : string
             title for plot and window, default: 'Average Fitness'
+        interactive : boolean
+            show live plot window, otherwise the figure is only saved,
+            default: True
     """
 
-    def __init__(self, rworld, modes, figtitle = "Average Fitness"):
+    def __init__(self, rworld, modes, figtitle = "Average Fitness", interactive=True):
+        if not interactive:
+            # no display available, render to file only
+            plt.switch_backend('Agg')
         self.modes = modes
         self.filename = self.generate_filename(rworld)
         self.title = self.generate_title(rworld)
@@ -44,8 +50,9 @@ class AverageFitness():
         plt.ylabel("Fitness")
         plt.xlabel("Generation")
         plt.title(self.title)
-        plt.ion()
-        plt.show()
+        if interactive:
+            plt.ion()
+            plt.show()
 
     def update(self, gf, cf, mf):
         """
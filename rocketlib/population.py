@@ -6,6 +6,123 @@ import numpy as np
 # import custom lib for Rocket DNA
 from rocketlib.dna import DNA
 
+# size of the rocket sprite images (rocket_small_rgb.png, rocket_small_green.png)
+rocketSize = (21, 21)
+
+# number of pre-rotated sprite images per atlas
+atlasHeadings = 64
+
+# process wide cache of converted sprite surfaces, shared by all rockets
+_surfaceCache = {}
+_surfaceCacheStats = {'hits': 0, 'misses': 0}
+_atlasCache = {}
+
+
+def load_surface(imgFolder, img):
+    """
+    Description:
+    ------------
+        load and convert a sprite image once and share the surface between
+        all rockets. Rockets never draw on original_image, rotated copies are
+        created with pg.transform.rotate.
+    Parameters:
+    -----------
+        imgFolder: string
+            filepath of the sprite image
+        img: string
+            filename of the sprite image
+    Returns:
+    --------
+        surface : pg.Surface
+    """
+    key = os.path.join(imgFolder, img)
+    surface = _surfaceCache.get(key)
+    if surface is None:
+        _surfaceCacheStats['misses'] += 1
+        surface = pg.image.load(key).convert()
+        # (0,0,0) := BLACK, set_colorkey removes the opaque part of the sprite
+        surface.set_colorkey((0, 0, 0))
+        _surfaceCache[key] = surface
+    else:
+        _surfaceCacheStats['hits'] += 1
+    return surface
+
+
+def load_atlas(imgFolder, img, headings=atlasHeadings):
+    """
+    Description:
+    ------------
+        pre-rotated copies of a sprite image, quantised to a fixed number of
+        headings. Built once per image and shared between all rockets.
+    Parameters:
+    -----------
+        imgFolder: string
+            filepath of the sprite image
+        img: string
+            filename of the sprite image
+        headings: int
+            number of rotated images, default: atlasHeadings
+    Returns:
+    --------
+        atlas : list of pg.Surface
+            atlas[i] is rotated by i*360/headings degree
+    """
+    key = (os.path.join(imgFolder, img), headings)
+    atlas = _atlasCache.get(key)
+    if atlas is None:
+        surface = _surfaceCache.get(key[0])
+        if surface is None:
+            surface = load_surface(imgFolder, img)
+        atlas = [pg.transform.rotate(surface, i*360./headings)
+                 for i in range(headings)]
+        _atlasCache[key] = atlas
+    return atlas
+
+
+def heading_index(angles, headings=atlasHeadings):
+    """
+    Description:
+    ------------
+        map rotation angles to the index of the nearest atlas image
+    Parameters:
+    -----------
+        angles : float or np.array
+            rotation angles in degree
+        headings: int
+            number of atlas images, default: atlasHeadings
+    Returns:
+    --------
+        index : int or np.array of ints
+    """
+    index = np.round(np.asarray(angles)/(360./headings)).astype(int) % headings
+    if np.ndim(index) == 0:
+        return int(index)
+    return index
+
+
+def surface_cache_info():
+    """
+    Returns:
+    --------
+        info : dict
+            number of cache hits, misses and cached surfaces
+    """
+    return {'hits': _surfaceCacheStats['hits'],
+            'misses': _surfaceCacheStats['misses'],
+            'size': len(_surfaceCache)}
+
+
+def clear_surface_cache():
+    """
+    Description:
+    ------------
+        drop all cached surfaces, needed if the display is recreated
+    """
+    _surfaceCache.clear()
+    _atlasCache.clear()
+    _surfaceCacheStats['hits'] = 0
+    _surfaceCacheStats['misses'] = 0
+
 # Rocket Sprites Class
 
 
@@ -37,16 +154,12 @@ class Rocket(pg.sprite.Sprite):
         # create pygame sprite
         pg.sprite.Sprite.__init__(self)
 
-        # load rocket image for sprite
-        self.original_image = pg.image.load(os.path.join(
-            imgFolder, img)).convert()
-
-        # (0,0,0) := BLACK, set_colorkey removes the opaque part of the sprite
-        self.original_image.set_colorkey((0, 0, 0))
+        # shared rocket image for sprite
+        self.original_image = load_surface(imgFolder, img)
 
-        # keep original_image to create rotated copies to image
+        # keep original_image, rotated copies are taken from the atlas
         self.image = self.original_image
-        self.image.set_colorkey((0, 0, 0))
+        self.atlas = load_atlas(imgFolder, img)
 
         # used to turn the spirtes
         self.rot_angle = 0
@@ -60,6 +173,9 @@ class Rocket(pg.sprite.Sprite):
         self.fitness = 0
         # path history for trajectory lines
         self.trajectory = [self.initialPos]
+        # streamed fitness data, set by the simulation engine
+        self.travelDist = None
+        self.closestDist = None
         
         self.resolution = resolution
         self.updateCounter = 0
@@ -72,6 +188,9 @@ class Rocket(pg.sprite.Sprite):
     def getPos(self):
         return self.rect.center
 
+    def setPos(self, pos):
+        self.rect.center = pos
+
     def rot_center(self, angle=None):
         """ 
         rotates the sprite while keeping its center
@@ -89,7 +208,17 @@ class Rocket(pg.sprite.Sprite):
             # permanent rotation in 45° steps, used when out of fuel
             self.rot_angle += 45 % 360
         # rotate
-        self.image = pg.transform.rotate(self.original_image, angle)
+        self.rot_atlas(heading_index(angle, len(self.atlas)))
+
+    def rot_atlas(self, index):
+        """
+        sets the sprite to a pre-rotated atlas image while keeping its center
+        Parameters
+        ----------
+            index : int
+                index of the atlas image, see heading_index
+        """
+        self.image = self.atlas[index]
         self.rect = self.image.get_rect(center=self.rect.center)
 
     def get_rotangle(self, newPos):
@@ -168,3 +297,67 @@ class Rocket(pg.sprite.Sprite):
         self.dnaCounter += 1
 
         return
+
+
+class RocketData(object):
+    """
+    Description:
+    ------------
+        plain data version of a Rocket for headless simulation. No sprite,
+        surface or image is created.
+    Parameters:
+    -----------
+        resolution: tuple
+            tuple of width and height of the screen
+        id: int
+            number of created rockets
+    """
+
+    def __init__(self, resolution, id, dna=None, king=False):
+        if(dna is None):
+            self.dna = DNA()
+            self.dna.generateNewRandomDNA()
+        else:
+            self.dna = dna
+        self.king = king
+
+        # position and speed
+        self.initialPos = (resolution[0]/2, resolution[1]-rocketSize[1]/2)
+        self.curSpeed = (0., 0.)
+        self.pos = self.initialPos
+
+        self.fitness = 0
+        # path history
+        self.trajectory = [self.initialPos]
+        # streamed fitness data, set by the simulation engine
+        self.travelDist = None
+        self.closestDist = None
+
+        self.resolution = resolution
+        self.updateCounter = 0
+        self.dnaCounter = 0
+        self.killFlag = False
+
+    def getInitialPos(self):
+        return self.initialPos
+
+    def getPos(self):
+        return self.pos
+
+    def setPos(self, pos):
+        self.pos = pos
+
+
+class RocketGroup(list):
+    """
+    Description:
+    ------------
+        list of RocketData with the interface of pg.sprite.Group used by the
+        RocketWorld
+    """
+
+    def add(self, *rockets):
+        self.extend(rockets)
+
+    def sprites(self):
+        return list(self)
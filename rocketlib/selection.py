@@ -2,10 +2,16 @@ import numpy as np
 from copy import deepcopy
 
 from rocketlib.population import Rocket
-from rocketlib.dna import DNA
+from rocketlib.dna import DNA, FitnessRanking
 # dictonaries
-parentselectionmodes = {0: 'fps', 1: 'lin', 2: 'exp', 3: 'by_value'}
+parentselectionmodes = {0: 'fps', 1: 'lin', 2: 'exp', 3: 'by_value', 4: 'tour'}
 survirorselectionmode = {0: '1gen', 1: 'rpl'}
+samplermodes = {0: 'choice', 1: 'alias', 2: 'sus'}
+
+# cached rank probabilities and alias tables per (populationSize, s, mode)
+_rankTableCache = {}
+_aliasCache = {}
+_samplerCacheStats = {'hits': 0, 'misses': 0}
 
 
 def selection_by_absolute_value(population, maxfitness, limit):
@@ -98,14 +104,9 @@ def ranking_selection(population, populationSize, s=2, selectSize=None, mode='li
     for rocket in population:
         rockets.append(rocket)
 
-    probabilities = None
-
     rockets.sort(key=sort_key)
 
-    if mode == 'lin':
-        probabilities = p_rank_lin(s, populationSize)
-    elif mode == 'exp':
-        probabilities = p_rank_exp(populationSize)
+    probabilities = rank_probabilities(populationSize, s, mode)
 
     # get random rocket indices based on their probabilities
     choices = np.random.choice(populationSize, selectSize, p=probabilities)
@@ -125,16 +126,363 @@ def survivor_replace_worst(population, childpopulation, populationSize):
     for rocket in childpopulation:
         rockets.append(rocket)
 
-    rockets.sort(key=sort_key, reverse=True)
+    fitness = np.array([rocket.fitness for rocket in rockets])
+    parents = len(rockets)-len(childpopulation)
+    survivors = survivor_replace_worst_indices(
+        fitness[:parents], fitness[parents:], populationSize)
 
     selecteddna = []
-    for i in range(populationSize):
+    for i in survivors:
         selecteddna.append(deepcopy(rockets[i].dna))
     #print("Fitness of all rockets %s" %(len(rockets)))
     #print(np.round([rocket.fitness for rocket in rockets]))
     return selecteddna
 
 
+#------------------------------------------------------------------------------#
+#                        SECTION INDEX BASED SELECTION                         #
+#------------------------------------------------------------------------------#
+# The following functions work on fitness arrays, e.g. GenomePool.fitness,
+# and return index arrays into the population instead of copies of the DNA.
+
+def selection_by_absolute_value_indices(fitness, maxfitness, limit):
+    """
+    Parameters
+    -----------
+        fitness     : np.array
+                fitness of the population
+        maxfitness  : float
+        limit       : float
+                fitness value limit to discriminate
+    Returns
+    -------
+        indices     : np.array of ints
+                indices of the individuals chosen for the next generation
+    """
+    return np.flatnonzero(maxfitness*limit <= np.asarray(fitness))
+
+
+def fitness_proportional_selection_indices(fitness, selectSize=None,
+                                           sampler='choice'):
+    """
+    Parameters
+    ----------
+        fitness         : np.array
+                fitness of the population
+        selectSize      : int
+                number of selected individuals, default: population size
+        sampler         : str
+                sampling method, see draw_indices, default: 'choice'
+    Returns
+    --------
+        indices         : np.array of ints
+    """
+    if selectSize == None:
+        selectSize = len(fitness)
+
+    # calculate fitness-based probabilities
+    propabilities = np.asarray(fitness)/np.sum(fitness)
+
+    # get random indices based on their probabilities
+    return draw_indices(propabilities, selectSize, sampler)
+
+
+def ranking_selection_indices(fitness, s=2, selectSize=None, mode='lin',
+                              sampler='choice', ranking=None):
+    """
+    Parameters
+    ----------
+        fitness     : np.array
+            fitness of the population
+        s           : int
+            parameter for linear ranking (0...2)
+        selectSize  : int
+            number of selected individuals, default: population size
+        mode        : str
+            mode for ranking
+            'lin' : linear ranking
+            'exp' : exponential ranking
+        sampler     : str
+            sampling method, see draw_indices, default: 'choice'
+        ranking     : FitnessRanking
+            shared ranking of fitness, default: None (sort fitness)
+    Returns
+    --------
+        indices     : np.array of ints
+    """
+    populationSize = len(fitness)
+    if selectSize == None:
+        selectSize = populationSize
+
+    # ascending fitness order, stable like list.sort
+    if ranking is None:
+        ranking = FitnessRanking(fitness)
+    ranking = ranking.order
+
+    # get random ranks based on their probabilities
+    key = (populationSize, s, mode)
+    choices = draw_indices(rank_probabilities(populationSize, s, mode),
+                           selectSize, sampler, key=key)
+    return ranking[choices]
+
+
+def tournament_selection_indices(fitness, k=3, selectSize=None):
+    """
+    Parameters
+    ----------
+        fitness     : np.array
+            fitness of the population
+        k           : int
+            tournament size, larger tournaments raise the selection pressure
+        selectSize  : int
+            number of selected individuals, default: population size
+    Returns
+    --------
+        indices     : np.array of ints
+
+    Description
+    -----------
+        every parent is the fittest of k individuals drawn with replacement.
+        All tournaments are drawn as one (selectSize, k) index matrix, so no
+        sorting of the population is needed.
+    """
+    if selectSize == None:
+        selectSize = len(fitness)
+
+    contestants = np.random.randint(0, len(fitness), (selectSize, k))
+    winners = np.argmax(np.asarray(fitness)[contestants], axis=1)
+    return contestants[np.arange(selectSize), winners]
+
+
+def survivor_replace_worst_indices(fitness, childfitness, populationSize,
+                                   ranking=None, childranking=None):
+    """
+    Parameters
+    ----------
+        fitness         : np.array
+            fitness of the current population
+        childfitness    : np.array
+            fitness of the evaluated children
+        populationSize  : int
+        ranking         : FitnessRanking
+            shared ranking of fitness, default: None
+        childranking    : FitnessRanking
+            shared ranking of childfitness, default: None
+    Returns
+    --------
+        indices         : np.array of ints
+            indices of the best individuals, the best one first, the others
+            unordered. Indices >= len(fitness) refer to child
+            index-len(fitness).
+
+    Description
+    -----------
+        top-k selection with np.argpartition in linear time, only the best
+        survivor (king) is determined on the selected slice.
+    """
+    combined = np.concatenate((fitness, childfitness))
+    if populationSize < len(combined):
+        survivors = np.argpartition(-combined, populationSize-1)
+        survivors = survivors[:populationSize]
+    else:
+        survivors = np.arange(len(combined))
+    # move the best survivor to the front. If more than populationSize
+    # individuals tie at the top, argpartition may drop the king of the
+    # shared rankings, any of the selected ones is then a valid king.
+    best = None
+    if ranking is not None and childranking is not None and len(childfitness):
+        king = ranking.best
+        if childranking.max > ranking.max:
+            king = len(fitness) + childranking.best
+        match = np.flatnonzero(survivors == king)
+        if len(match):
+            best = match[0]
+    if best is None:
+        best = np.argmax(combined[survivors])
+    survivors[[0, best]] = survivors[[best, 0]]
+    return survivors
+
+#!SECTION
+
+
+#------------------------------------------------------------------------------#
+#                              SECTION SAMPLER                                 #
+#------------------------------------------------------------------------------#
+# Samplers draw indices from a discrete probability distribution. Ranking
+# probabilities only depend on the population size, so their tables and
+# alias tables are built once and reused every generation.
+
+def rank_probabilities(populationSize, s=2, mode='lin'):
+    """
+    Parameters
+    ----------
+        populationSize  : int
+        s               : int
+            parameter for linear ranking (0...2)
+        mode            : str
+            'lin' : linear ranking
+            'exp' : exponential ranking
+    Returns
+    --------
+        probabilities   : np.array
+            read-only selection probability of every rank, ascending fitness
+    """
+    key = (populationSize, s, mode)
+    probabilities = _rankTableCache.get(key)
+    if probabilities is None:
+        _samplerCacheStats['misses'] += 1
+        if mode == 'lin':
+            probabilities = np.asarray(p_rank_lin(s, populationSize))
+        elif mode == 'exp':
+            probabilities = np.asarray(p_rank_exp(populationSize))
+        else:
+            raise ValueError("Unknown ranking mode: %s" % mode)
+        probabilities.flags.writeable = False
+        _rankTableCache[key] = probabilities
+    else:
+        _samplerCacheStats['hits'] += 1
+    return probabilities
+
+
+class AliasSampler(object):
+    """
+    Description:
+    ------------
+        Walker's alias method. After an O(N) setup every draw costs one
+        random index and one uniform number.
+    Parameters:
+    -----------
+        probabilities : np.array
+            probabilities of the N indices, normalised internally
+    """
+
+    def __init__(self, probabilities):
+        p = np.asarray(probabilities, dtype=float)
+        n = len(p)
+        scaled = p*n/np.sum(p)
+        self.prob = np.ones(n)
+        self.alias = np.arange(n)
+
+        small = list(np.flatnonzero(scaled < 1))
+        large = list(np.flatnonzero(scaled >= 1))
+        # pair every underfull index with an overfull one (Vose)
+        while small and large:
+            l = small.pop()
+            g = large.pop()
+            self.prob[l] = scaled[l]
+            self.alias[l] = g
+            scaled[g] = scaled[g] + scaled[l] - 1
+            if scaled[g] < 1:
+                small.append(g)
+            else:
+                large.append(g)
+        # remaining entries are 1 up to rounding errors
+
+    def __len__(self):
+        return len(self.prob)
+
+    def sample(self, size):
+        """
+        Parameters
+        ----------
+            size : int
+                number of drawn indices
+        Returns
+        --------
+            indices : np.array of ints
+        """
+        i = np.random.randint(0, len(self.prob), size)
+        return np.where(np.random.uniform(size=size) < self.prob[i],
+                        i, self.alias[i])
+
+
+def stochastic_universal_sampling(probabilities, selectSize):
+    """
+    Parameters
+    ----------
+        probabilities   : np.array
+            probabilities of the N indices
+        selectSize      : int
+            number of drawn indices
+    Returns
+    --------
+        indices         : np.array of ints
+            drawn indices in ascending order
+
+    Description
+    -----------
+        selectSize equally spaced pointers with one random offset on the
+        cumulative probabilities. Every index is drawn floor or ceil of its
+        expected number of times.
+    """
+    cumulative = np.cumsum(probabilities)
+    cumulative = cumulative/cumulative[-1]
+    pointers = (np.random.uniform() + np.arange(selectSize))/selectSize
+    indices = np.searchsorted(cumulative, pointers, side='right')
+    return np.minimum(indices, len(cumulative)-1)
+
+
+def draw_indices(probabilities, selectSize, sampler='choice', key=None):
+    """
+    Parameters
+    ----------
+        probabilities   : np.array
+            probabilities of the N indices
+        selectSize      : int
+            number of drawn indices
+        sampler         : str
+            'choice' : np.random.choice
+            'alias'  : alias method
+            'sus'    : stochastic universal sampling
+        key             : hashable
+            cache key of the probabilities for the alias table, e.g.
+            (populationSize, s, mode), default: None (no caching)
+    Returns
+    --------
+        indices         : np.array of ints
+    """
+    if sampler == samplermodes.get(0):
+        return np.random.choice(len(probabilities), selectSize,
+                                p=probabilities)
+    elif sampler == samplermodes.get(1):
+        alias = None if key is None else _aliasCache.get(key)
+        if alias is None:
+            alias = AliasSampler(probabilities)
+            if key is not None:
+                _aliasCache[key] = alias
+        return alias.sample(selectSize)
+    elif sampler == samplermodes.get(2):
+        return stochastic_universal_sampling(probabilities, selectSize)
+    raise ValueError("Unknown sampler: %s" % sampler)
+
+
+def sampler_cache_info():
+    """
+    Returns:
+    --------
+        info : dict
+            number of rank table hits, misses and cached tables
+    """
+    return {'hits': _samplerCacheStats['hits'],
+            'misses': _samplerCacheStats['misses'],
+            'size': len(_rankTableCache),
+            'alias': len(_aliasCache)}
+
+
+def clear_sampler_cache():
+    """
+    Description:
+    ------------
+        drop all cached rank probabilities and alias tables
+    """
+    _rankTableCache.clear()
+    _aliasCache.clear()
+    _samplerCacheStats['hits'] = 0
+    _samplerCacheStats['misses'] = 0
+
+#!SECTION
+
+
 def sort_key(rocket):
     return rocket.fitness
 
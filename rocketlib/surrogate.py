@@ -0,0 +1,148 @@
+# coding: utf8
+import numpy as np
+
+def dna_features(genes, length=None, bins=10):
+    """
+    Description:
+    ------------
+        downsampled DNA, the mean acceleration of each axis in bins equal
+        blocks of the genes
+    Parameters:
+    -----------
+        genes  : np.array, shape (N, 2, L)
+        length : np.array of ints, shape (N,)
+            number of valid genes of each individual, genes beyond count as
+            zero, default: None (all)
+        bins   : int
+            number of blocks per axis, default: 10
+    Returns:
+    --------
+        features : np.array, shape (N, 2*bins)
+    """
+    genes = np.asarray(genes, dtype=float)
+    size, _, steps = genes.shape
+    if length is not None:
+        valid = np.arange(steps)[None, :] < np.reshape(length, (-1, 1))
+        genes = np.where(valid[:, None, :], genes, 0.)
+    bins = max(min(bins, steps), 1)
+    edges = np.linspace(0, steps, bins+1).astype(int)[:-1]
+    counts = np.diff(np.append(edges, steps))
+    blocks = np.add.reduceat(genes, edges, axis=2)/counts
+    return blocks.reshape(size, -1)
+
+
+class SurrogateModel(object):
+    """
+    Description:
+    ------------
+        cheap predictor of the fitness of genomes, learned online from
+        simulated individuals. The prediction is the distance weighted mean
+        log fitness of the k nearest samples in the training buffer, which
+        keeps the last bufferSize samples. Distances are measured between
+        standardised downsampled DNA, see dna_features.
+    Parameters:
+    -----------
+        bufferSize  : int
+            maximal number of training samples, default: 1000
+        bins        : int
+            blocks per axis of the downsampled DNA, default: 10
+        k           : int
+            number of neighbours, default: 3
+        minSamples  : int
+            number of samples before predictions are made, default: 50
+    """
+
+    def __init__(self, bufferSize=1000, bins=10, k=3, minSamples=50):
+        self.bufferSize = bufferSize
+        self.bins = bins
+        self.k = k
+        self.minSamples = minSamples
+
+        # ring buffer of training samples, the oldest sample is overwritten
+        self._features = None
+        self._targets = np.zeros(bufferSize)
+        self._next = 0
+        self._count = 0
+
+        # feature standardisation of the current buffer
+        self._mean = None
+        self._scale = None
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def ready(self):
+        """ fitted on enough samples to predict """
+        return self._mean is not None
+
+    def update(self, pool, indices=None):
+        """
+        Description:
+        ------------
+            add simulated individuals to the training buffer
+        Parameters:
+        -----------
+            pool    : GenomePool
+            indices : np.array of ints
+                individuals with a simulated fitness, non finite fitness is
+                left out, default: None (all)
+        """
+        if indices is None:
+            indices = np.arange(len(pool))
+        indices = np.asarray(indices, dtype=int)
+        targets = np.asarray(pool.fitness, dtype=float)[indices]
+        finite = np.isfinite(targets) & (targets > 0)
+        indices, targets = indices[finite], targets[finite]
+        if not len(indices):
+            return
+        features = dna_features(pool.genes[indices], pool.length[indices],
+                                self.bins)
+        if self._features is None:
+            self._features = np.zeros((self.bufferSize, features.shape[1]))
+        # only the last bufferSize samples fit into the buffer
+        features = features[-self.bufferSize:]
+        targets = targets[-self.bufferSize:]
+        rows = (self._next + np.arange(len(targets))) % self.bufferSize
+        self._features[rows] = features
+        self._targets[rows] = np.log(targets)
+        self._next = (self._next + len(targets)) % self.bufferSize
+        self._count = min(self._count + len(targets), self.bufferSize)
+
+    def fit(self):
+        """
+        Description:
+        ------------
+            retrain the model on the current training buffer, i.e. update
+            the feature standardisation
+        """
+        if self._count < max(self.minSamples, 1):
+            return
+        X = self._features[:self._count]
+        self._mean = X.mean(axis=0)
+        self._scale = X.std(axis=0)
+        self._scale[self._scale == 0] = 1.
+
+    def predict(self, pool):
+        """
+        Description:
+        ------------
+            predict the fitness of the genomes of a pool
+        Parameters:
+        -----------
+            pool : GenomePool
+        Returns:
+        --------
+            fitness : np.array, shape (N,)
+        """
+        Z = (dna_features(pool.genes, pool.length, self.bins) -
+             self._mean)/self._scale
+        samples = (self._features[:self._count] - self._mean)/self._scale
+        dist = np.sqrt(np.maximum(
+            (Z**2).sum(axis=1)[:, None] - 2*Z.dot(samples.T) +
+            (samples**2).sum(axis=1)[None, :], 0.))
+        k = min(self.k, self._count)
+        nearest = np.argpartition(dist, k-1, axis=1)[:, :k]
+        weights = 1./(np.take_along_axis(dist, nearest, axis=1) + 1e-9)
+        targets = self._targets[:self._count][nearest]
+        return np.exp((weights*targets).sum(axis=1)/weights.sum(axis=1))
@@ -63,6 +63,10 @@ def parser():
                         help="set automatic screen scaler, value between 0 and 1. Ignored if -r option is used.", dest="scale", metavar="SCALE")
     parser.add_argument("-v", "--verbose", help="increase output verbosity",
                         action="store_true", dest="verbose")
+    parser.add_argument("--headless", help="run without display, sprites and image loading (simulation only)",
+                        action="store_true", dest="headless")
+    parser.add_argument("--islands", type=int, metavar="K",
+                        help="evolve K islands in separate processes with periodic migration (simulation only)", dest="islands")
     args=parser.parse_args()
     if args.verbose:
         print("verbosity turned on")
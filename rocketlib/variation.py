@@ -213,37 +213,402 @@ def simple_arithmetic_crossover(parent_dna, alpha=None, fullmode=False):
 #!SECTION
 
 #------------------------------------------------------------------------------#
-#                               SECTION MUTATION                               #
+#                      SECTION GENOME MATRIX CROSSOVER                         #
 #------------------------------------------------------------------------------#
+# The matrix operators read the parent rows directly from the population
+# genes by index, children are written only once. With record=True they also
+# return the lineage of the children: the index of the parent every child
+# starts with (origin) and the first gene index at which the child may differ
+# from it (divergence), see _lineage.
 
+def mating_order(genes, parents=None):
+    """
+    Parameters
+    ----------
+        genes: np.array, shape (N, 2, L)
+            genes of the population
+        parents: np.array of ints
+            indices of the selected parents, default: None (all genomes)
+    Returns
+    --------
+        parents: np.array of ints
+            parent indices in random order, consecutive entries are mated
+    """
+    if parents is None:
+        parents = np.arange(len(genes))
+    return np.random.permutation(parents)
 
-def mutate_dnas(dnaList, mutation_rate):
 
-    mutateddna = deepcopy(dnaList)
-    # choose how many DNAs to mutate by mutation rate
-    dnas_to_mutate = np.random.binomial(len(dnaList), mutation_rate)
-    # determine dna indicies of DNAs to mutate
-    # TODO mehrfach gleiche Indizes möglich?!?!?!**##!111elf
-    dna_indicies = np.random.randint(0, len(dnaList), int(dnas_to_mutate))
+def _lineage(parents, length, divA=None, divB=None):
+    """
+    Parameters
+    ----------
+        parents: np.array of ints
+            parent indices in mating order
+        length: int
+            number of genes of one genome
+        divA: np.array of ints
+            divergence of the first child of every pair, default: None
+        divB: np.array of ints
+            divergence of the second child of every pair, default: None
+    Returns
+    --------
+        origin: np.array of ints
+            the first child of a pair starts with mate A, the second child
+            with mate B, an unpaired parent is copied
+        divergence: np.array of ints
+            first gene index at which a child may differ from its origin,
+            length for unchanged copies
+    """
+    origin = np.array(parents, dtype=int)
+    divergence = np.full(len(parents), length, dtype=int)
+    pairs = len(parents)//2
+    if divA is not None:
+        divergence[0:2*pairs:2] = divA
+    if divB is not None:
+        divergence[1:2*pairs:2] = divB
+    return origin, divergence
+
+
+def copy_parents(genes, parents=None, record=False):
+    """
+    Parameters
+    ----------
+        genes: np.array, shape (N, 2, L)
+            genes of the population
+        parents: np.array of ints
+            indices of the selected parents, default: None (all genomes)
+        record: boolean
+            also return origin and divergence of the children, default: False
+    Returns
+    --------
+        children: np.array, shape (M, 2, L)
+            copies of the parents without crossover
+    """
+    if parents is None:
+        parents = np.arange(len(genes))
+    children = genes[parents]
+    if record:
+        return (children,) + _lineage(parents, np.shape(genes)[2])
+    return children
+
+
+def mating_pairs(genes, parents=None):
+    """
+    Parameters
+    ----------
+        genes: np.array, shape (N, 2, L)
+            genes of the population
+        parents: np.array of ints
+            indices of the selected parents, default: None (all genomes)
+    Returns
+    --------
+        parents: np.array of ints
+            parent indices in random order
+        mateA: np.array, shape (pairs, 2, L)
+            genes of the first parent of each pair
+        mateB: np.array, shape (pairs, 2, L)
+            genes of the second parent of each pair
+    """
+    parents = mating_order(genes, parents)
+    pairs = len(parents)//2
+    return (parents, genes[parents[0:2*pairs:2]],
+            genes[parents[1:2*pairs:2]])
+
+
+def crossover_1point_matrix(genes, parents=None, record=False):
+    """
+    Parameters
+    ----------
+        genes: np.array, shape (N, 2, L)
+            genes of the population
+        parents: np.array of ints
+            indices of the selected parents, default: None (all genomes)
+        record: boolean
+            also return origin and divergence of the children, default: False
+    Returns
+    --------
+        children: np.array, shape (M, 2, L)
+
+    Description
+    -----------
+        batched version of crossover_1point, the crossover points of all
+        pairs are drawn at once and the children are built with a mask.
+    """
+    parents, mateA, mateB = mating_pairs(genes, parents)
+    pairs = len(mateA)
+    children = np.empty((len(parents),) + np.shape(genes)[1:])
+
+    # genes behind the crossover point are taken from the other parent
+    r = np.random.randint(0, np.shape(genes)[2], pairs)
+    swap = (np.arange(np.shape(genes)[2])[None, :] >= r[:, None])[:, None, :]
+    children[0:2*pairs:2] = np.where(swap, mateB, mateA)
+    children[1:2*pairs:2] = np.where(swap, mateA, mateB)
+    # unpaired parent
+    children[2*pairs:] = genes[parents[2*pairs:]]
+    if record:
+        return (children,) + _lineage(parents, np.shape(genes)[2], r, r)
+    return children
+
+
+def crossover_full_matrix(genes, parents=None, record=False):
+    """
+    Parameters
+    ----------
+        genes: np.array, shape (N, 2, L)
+            genes of the population
+        parents: np.array of ints
+            indices of the selected parents, default: None (all genomes)
+        record: boolean
+            also return origin and divergence of the children, default: False
+    Returns
+    --------
+        children: np.array, shape (M, 2, L)
+
+    Description
+    -----------
+        interleaving crossover like crossover_full: the first child takes
+        the odd genes of mate B on its even positions, the second child the
+        even genes of mate B on its odd positions, both based on mate A.
+    """
+    parents, mateA, mateB = mating_pairs(genes, parents)
+    pairs = len(mateA)
+    children = np.empty((len(parents),) + np.shape(genes)[1:])
+    odd = np.shape(genes)[2]//2
+
+    children[0:2*pairs:2] = mateA
+    children[1:2*pairs:2] = mateA
+    children[0:2*pairs:2, :, 0:2*odd:2] = mateB[:, :, 1::2]
+    children[1:2*pairs:2, :, 1::2] = mateB[:, :, ::2][:, :, :odd]
+    # unpaired parent
+    children[2*pairs:] = genes[parents[2*pairs:]]
+    if record:
+        # both children are based on mate A
+        origin, divergence = _lineage(parents, np.shape(genes)[2], 0,
+                                      min(1, np.shape(genes)[2]))
+        origin[1:2*pairs:2] = parents[0:2*pairs:2]
+        return children, origin, divergence
+    return children
+
+
+def crossover_npoint_matrix(genes, points, parents=None, record=False):
+    """
+    Parameters
+    ----------
+        genes: np.array, shape (N, 2, L)
+            genes of the population
+        points: int
+            number of crossover points
+        parents: np.array of ints
+            indices of the selected parents, default: None (all genomes)
+        record: boolean
+            also return origin and divergence of the children, default: False
+    Returns
+    --------
+        children: np.array, shape (M, 2, L)
 
-    # length of single DNA (amount of genes)
-    dna_length = len(dnaList[0].path[1, :])
+    Description
+    -----------
+        the children of each pair of parents swap the genes between every
+        second pair of consecutive crossover points. The crossover points of
+        all pairs are drawn at once.
+    """
+    length = np.shape(genes)[2]
+    # check, if number of given points are to many, or equal full crossover
+    if (points >= length-1):
+        print("Given number of crossover points to large!")
+        print("Number of crossover points reduced to fit path length.")
+        print("Using <crossover_full_matrix> instead.")
+        return crossover_full_matrix(genes, parents, record)
+
+    parents, mateA, mateB = mating_pairs(genes, parents)
+    pairs = len(mateA)
+    children = np.empty((len(parents),) + np.shape(genes)[1:])
+
+    # distinct crossover points 1...L-1 for every pair: the positions of the
+    # smallest random keys
+    keys = np.random.uniform(size=(pairs, length-1))
+    crossover_points = np.argpartition(keys, points-1, axis=1)[:, :points]+1
+    cuts = np.zeros((pairs, length), dtype=int)
+    cuts[np.arange(pairs)[:, None], crossover_points] = 1
+
+    # genes behind an odd number of crossover points are swapped
+    swap = (np.cumsum(cuts, axis=1) % 2 == 1)[:, None, :]
+    children[0:2*pairs:2] = np.where(swap, mateB, mateA)
+    children[1:2*pairs:2] = np.where(swap, mateA, mateB)
+    # unpaired parent
+    children[2*pairs:] = genes[parents[2*pairs:]]
+    if record:
+        first = crossover_points.min(axis=1)
+        return (children,) + _lineage(parents, length, first, first)
+    return children
+
+
+def simple_arithmetic_crossover_matrix(genes, parents=None, alpha=None,
+                                       fullmode=False, record=False):
+    """
+    Parameters
+    ----------
+        genes: np.array, shape (N, 2, L)
+            genes of the population
+        parents: np.array of ints
+            indices of the selected parents, default: None (all genomes)
+        alpha: float
+            recombination coefficient, defaul: None (random)
+        fullmode: boolean
+            also recombine the lower half of the dna sequence, which doubles
+            the amount of children, default: False
+        record: boolean
+            also return origin and divergence of the children, default: False
+    Returns
+    --------
+        children: np.array, shape (M, 2, L) or (2M, 2, L) in fullmode
 
-    # choose how many genes on one DNA shall be mutated
-    genes_to_mutate = int(dna_length/10)
+    Description
+    -----------
+        batched version of simple_arithmetic_crossover
+    """
+    if (alpha==None):
+        alpha = np.random.uniform()
+    parents, mateA, mateB = mating_pairs(genes, parents)
+    pairs = len(mateA)
+    size = len(parents)
+    children = np.empty(((2 if fullmode else 1)*size,) + np.shape(genes)[1:])
+
+    # get random entries in the pathlist
+    r = np.random.randint(0, np.shape(genes)[2], pairs)
+    upper = (np.arange(np.shape(genes)[2])[None, :] >= r[:, None])[:, None, :]
+    recombination_data = alpha*mateA + (1-alpha)*mateB
 
-    for i in dna_indicies:
+    children[0:2*pairs:2] = np.where(upper, recombination_data, mateA)
+    children[1:2*pairs:2] = np.where(upper, recombination_data, mateB)
+    children[2*pairs:size] = genes[parents[2*pairs:]]
 
-        gen_indicies = np.random.randint(0, dna_length, genes_to_mutate)
-        # print('gen ind: %s' % (gen_indicies))
-        for j in gen_indicies:
+    if(fullmode):
+        children[size:size+2*pairs:2] = np.where(upper, mateA,
+                                                 recombination_data)
+        children[size+1:size+2*pairs:2] = np.where(upper, mateB,
+                                                   recombination_data)
+        children[size+2*pairs:] = genes[parents[2*pairs:]]
+
+    if record:
+        origin, divergence = _lineage(parents, np.shape(genes)[2], r, r)
+        if(fullmode):
+            # the lower half starts with the recombination data
+            lower = _lineage(parents, np.shape(genes)[2], 0, 0)
+            origin = np.concatenate((origin, lower[0]))
+            divergence = np.concatenate((divergence, lower[1]))
+        return children, origin, divergence
+    return children
+
+#!SECTION
+
+#------------------------------------------------------------------------------#
+#                               SECTION MUTATION                               #
+#------------------------------------------------------------------------------#
 
-            if j < 200:
 
-                mutateddna[i].path[0, j] = (
-                    ut.random_floats(decimals=3)-0.5)*14
-                mutateddna[i].path[1, j] = (ut.random_floats(decimals=3))*20
+def mutate_dnas(dnaList, mutation_rate, gene_rate=0.1):
+    """
+    Parameters
+    ----------
+        dnaList: list
+            list of DNA which shall be mutated
+        mutation_rate: float
+            probability of a DNA to be mutated
+        gene_rate: float
+            share of genes of a chosen DNA which get new values, default: 0.1
+    Returns
+    --------
+        mutateddna: list
+            mutated copies of the DNA
 
+    Description
+    -----------
+        list version of mutate_matrix
+    """
+    mutateddna = deepcopy(dnaList)
+    if len(mutateddna) == 0:
+        return mutateddna
+    genes = mutate_matrix(np.array([dna.path for dna in mutateddna]),
+                          mutation_rate, inplace=True, gene_rate=gene_rate)
+    for dna, path in zip(mutateddna, genes):
+        dna.path = path
     return mutateddna
 
+
+def mutation_mask(size, length, mutation_rate, gene_rate=0.1):
+    """
+    Parameters
+    ----------
+        size: int
+            number of genomes
+        length: int
+            number of genes of one genome
+        mutation_rate: float
+            probability of a genome to be mutated
+        gene_rate: float
+            share of genes of a chosen genome which get new values,
+            default: 0.1
+    Returns
+    --------
+        mask: np.array of booleans, shape (size, length)
+            True for every gene which shall be mutated
+    """
+    mask = np.zeros((size, length), dtype=bool)
+    # choose how many genomes to mutate by mutation rate, the same genome
+    # can be drawn several times
+    dnas_to_mutate = np.random.binomial(size, mutation_rate)
+    dna_indicies = np.random.randint(0, size, int(dnas_to_mutate))
+
+    # choose how many genes on one genome shall be mutated
+    genes_to_mutate = int(length*gene_rate)
+    gen_indicies = np.random.randint(
+        0, length, (len(dna_indicies), genes_to_mutate))
+    mask[dna_indicies[:, None], gen_indicies] = True
+    return mask
+
+
+def mutate_matrix(genes, mutation_rate, inplace=False, gene_rate=0.1,
+                  divergence=None):
+    """
+    Parameters
+    ----------
+        genes: np.array, shape (M, 2, L)
+            genomes which shall be mutated
+        mutation_rate: float
+            probability of a genome to be mutated
+        inplace: boolean
+            mutate genes directly instead of a copy, default: False
+        gene_rate: float
+            share of genes of a chosen genome which get new values,
+            default: 0.1
+        divergence: np.array of ints
+            first changed gene index of every genome, lowered in place to
+            the first mutated gene, default: None
+    Returns
+    --------
+        mutated: np.array, shape (M, 2, L)
+
+    Description
+    -----------
+        the genes of the mutation mask get new random accelerations, drawn
+        at once for the whole matrix: x in [-7, 7] and y in [0, 20].
+    """
+    if not inplace:
+        genes = genes.copy()
+    mask = mutation_mask(len(genes), np.shape(genes)[2], mutation_rate,
+                         gene_rate)
+
+    # one quantised draw for both coordinates of all mutated genes
+    u = ut.random_floats(decimals=3, size=(2, np.count_nonzero(mask)))
+    genes[:, 0, :][mask] = (u[0]-0.5)*14
+    genes[:, 1, :][mask] = u[1]*20
+
+    if divergence is not None:
+        mutated = np.flatnonzero(mask.any(axis=1))
+        divergence[mutated] = np.minimum(divergence[mutated],
+                                         mask[mutated].argmax(axis=1))
+    return genes
+
 #!SECTION
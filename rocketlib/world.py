@@ -1,16 +1,19 @@
 # coding: utf8
 import sys
 import os
-import copy
 import numpy as np
-from copy import deepcopy
 # pygame imports
 import pygame as pg
 from pygame.locals import QUIT, KEYDOWN, USEREVENT, K_ESCAPE, K_s, K_d, K_r
 from pygame.colordict import THECOLORS as COLORS
 
 # import rocket world libs
-from rocketlib.population import Rocket
+from rocketlib.population import Rocket, RocketData, RocketGroup, rocketSize, surface_cache_info
+from rocketlib.dna import GenomePool
+from rocketlib.cache import FitnessCache
+from rocketlib.surrogate import SurrogateModel
+from rocketlib.executor import EvaluationExecutor
+import rocketlib.engine as engine
 import rocketlib.utilities as ut
 import rocketlib.selection as selection
 import rocketlib.variation as variation
@@ -34,10 +37,97 @@ class RocketWorld(object):
         framerate       : int
         modes           : list
             list of algorithm parameters
+        engine          : str
+            simulation backend
+            'step'   : step by step simulation of the population
+            'closed' : closed-form evaluation of the whole lifetime without
+                       pixel snapping, its crashes and fitness can differ
+        headless        : boolean
+            run without display, sprites and image loading, default: False
+        streamFitness   : boolean
+            only keep trajectories of rockets which can be drawn, fitness is
+            calculated from streamed travel distances, default: False
+        sampler         : str
+            parent sampling method of fps and ranking selection
+            'choice' : np.random.choice
+            'alias'  : alias method with cached ranking tables
+            'sus'    : stochastic universal sampling
+        tournamentSize  : int
+            number of contestants per tournament of 'tour' selection,
+            default: 3
+        reuseFitness    : boolean
+            in simulation mode survivors keep fitness and final state of
+            their former simulation and only new individuals are simulated,
+            default: True
+        cacheSize       : int
+            number of genomes in the content-addressed fitness cache, which
+            is consulted before simulating in simulation mode and for the
+            children, 0 disables the cache, default: 4096
+        checkpointEvery : int
+            interval of the state checkpoints of the 'step' engine. Children
+            resume from the last checkpoint of their parent before their
+            first changed gene. The checkpoints are kept with the state of
+            every individual and in the fitness cache, which multiplies
+            their memory, default: 0 (no checkpoints)
+        pruneChildren   : boolean
+            stop the simulation of children, which provably cannot replace
+            one of the current individuals ('rpl' and 'step' engine only).
+            Survivors are the same, the average child fitness only covers
+            the admissible children, default: False
+        coarseFactor    : int
+            children are screened by a coarse simulation, which merges
+            coarseFactor steps into one, before the exact simulation,
+            1 disables the screening, default: 1
+        coarseFraction  : float
+            fraction of the screened children with the best coarse fitness
+            which is simulated exactly, the others keep their coarse
+            fitness, default: 0.5
+        auditSize       : int
+            number of random children per generation, screened out or not,
+            which coarse screening and surrogate simulate exactly to report
+            the rank correlation of estimated and exact fitness, 0 disables
+            the audit, default: 0
+        surrogate       : boolean
+            predict the fitness of the children with a nearest neighbour
+            surrogate model before their simulation, see SurrogateModel,
+            default: False
+        surrogateFraction : float
+            fraction of the children with the best predicted fitness which
+            is simulated, the others are not admitted, default: 0.5
+        surrogateExplore : float
+            fraction of the other children which is simulated anyway,
+            chosen at random, default: 0.1
+        surrogateBuffer : int
+            number of recently simulated individuals the surrogate is
+            trained on, default: 1000
+        executor        : str
+            backend of the simulations of new individuals, see
+            EvaluationExecutor, 'serial', 'thread', 'process' or 'tcp',
+            default: 'serial'
+        workers         : int
+            number of threads or processes of the executor, default: None
+            (number of cpus)
+        address         : tuple
+            host and port the coordinator of the 'tcp' executor listens on
+            for workers, default: None (('localhost', 5000))
+        timeout         : float
+            seconds a worker of the 'tcp' executor may take for one batch
+            before it is given to another worker, default: None (no limit)
+        wait            : float
+            seconds the 'tcp' executor waits for the simulation of all new
+            individuals, default: None (no limit)
     """
     
     def __init__(self, populationSize, resolution,
-                 lifeTime, target=(640, 100), framerate=30, modes:list=None):
+                 lifeTime, target=(640, 100), framerate=30, modes:list=None,
+                 engine='step', headless=False, streamFitness=False,
+                 sampler='choice', tournamentSize=3, reuseFitness=True,
+                 cacheSize=4096, checkpointEvery=0, pruneChildren=False,
+                 coarseFactor=1, coarseFraction=0.5, auditSize=0,
+                 surrogate=False,
+                 surrogateFraction=0.5, surrogateExplore=0.1,
+                 surrogateBuffer=1000, executor='serial', workers=None,
+                 address=None, timeout=None, wait=None):
 
         if modes == None:
             # set up default algorithm parameters
@@ -49,8 +139,20 @@ class RocketWorld(object):
         else:
             self.modes = modes
 
-        # population parameters
-        self.population = pg.sprite.OrderedUpdates()
+        # flags
+        self.timerFlag = False
+        self.activeGen = False
+        self.simulate = headless
+        self.start = headless
+        self.headless = headless
+
+        # population parameters, genomes of the population in self.pool are
+        # in the order of the rockets in self.population
+        self.pool = None
+        if self.headless:
+            self.population = RocketGroup()
+        else:
+            self.population = pg.sprite.OrderedUpdates()
         self.childpopulation = None
 
         # population parameters and stats
@@ -75,20 +177,51 @@ class RocketWorld(object):
         self.height = self.resolution[1]
         self.framerate = framerate
         self.target = target
+        self.initialPos = (self.resolution[0]/2,
+                           self.resolution[1]-rocketSize[1]/2)
+        self.engineMode = engine
+        self.streamFitness = streamFitness
+        self.sampler = sampler
+        self.tournamentSize = tournamentSize
+        self.reuseFitness = reuseFitness
+        self.checkpointEvery = checkpointEvery
+        self.pruneChildren = pruneChildren
+        self.pruneEvery = 10
+        self.coarseFactor = coarseFactor
+        self.coarseFraction = coarseFraction
+        # screened and exactly simulated children and the rank correlation
+        # of estimated and exact fitness of a random audit sample of
+        # auditSize children in every generation
+        self.auditSize = auditSize
+        self.screening = {'children': 0, 'exact': 0, 'agreement': []}
+        if surrogate:
+            self.surrogate = SurrogateModel(bufferSize=surrogateBuffer)
+        else:
+            self.surrogate = None
+        self.surrogateFraction = surrogateFraction
+        self.surrogateExplore = surrogateExplore
+        self.prescreening = {'children': 0, 'exact': 0, 'agreement': []}
+        self.executor = EvaluationExecutor(executor, workers,
+                                           address=address, timeout=timeout,
+                                           wait=wait)
+        if cacheSize > 0:
+            self.fitnessCache = FitnessCache(cacheSize, (
+                self.target, self.resolution, self.lifeTime, self.initialPos,
+                self.engineMode))
+        else:
+            self.fitnessCache = None
 
         # internal variables
         self.__clock = pg.time.Clock()
 
-        # flags
-        self.timerFlag = False
-        self.activeGen = False
-        self.simulate = False
-        self.start = False
-
         # set up directories
         self.gameFolder = os.path.dirname("__file__")
         self.imgFolder = os.path.join(self.gameFolder, "img")
 
+        # headless: no pygame window, no sprites
+        if self.headless:
+            return
+
         # set up pygame window
         pg.init()
         self.fontSize = 25
@@ -102,26 +235,397 @@ class RocketWorld(object):
         icon.set_colorkey(COLORS['white'])
         pg.display.set_icon(icon)
 
+    def createRocket(self, id, dna=None, king=False):
+        """
+        Description:
+        ------------
+            create a Rocket sprite, or plain RocketData in headless mode
+        """
+        if self.headless:
+            return RocketData(self.resolution, id, dna=dna, king=king)
+        return Rocket(self.imgFolder, self.resolution, id, dna=dna, king=king)
+
+    def createGroup(self):
+        """
+        Description:
+        ------------
+            create an empty rocket group, a plain RocketGroup in headless mode
+        """
+        if self.headless:
+            return RocketGroup()
+        return pg.sprite.Group()
+
     def createInitialGen(self):
-        for i in range(self.populationSize):
-            self.population.add(
-                Rocket(self.imgFolder, self.resolution, i))
-
-    def evaluateChildren(self, childdna):
-        self.childpopulation = pg.sprite.Group()
-        for i in range(len(childdna)):
-            self.childpopulation.add(Rocket(self.imgFolder, self.resolution, i,
-                                            dna=childdna[i]))
-
-        for curLifetime in range(self.lifeTime):
-            for rocket in self.childpopulation:
-                rocket.update(simulate=True)
-                if(rocket.killFlag == False):
-                    self.alive += 1
-            if (self.alive == 0):
-                break
-            self.alive = 0
+        self.pool = GenomePool.random(self.populationSize)
+        self.populate(self.pool)
+
+    def populate(self, pool, king=None):
+        """
+        Description:
+        ------------
+            replace the current generation by rockets for the genomes of pool
+        Parameters:
+        -----------
+            pool : GenomePool
+            king : int
+                index of the rocket with max fitness, default: None
+        """
+        self.killCurGen()
+        for i in range(len(pool)):
+            self.population.add(self.createRocket(i, dna=pool.dna(i),
+                                                  king=(i == king)))
+
+    def evaluateChildren(self, childpool, origin=None, divergence=None):
+        self.childpopulation = childpool
+        if (self.surrogate is not None and self.surrogate.ready and
+                len(childpool)):
+            self.prescreenChildren(childpool, origin, divergence)
+        elif self.coarseFactor > 1 and len(childpool):
+            self.screenChildren(childpool, origin, divergence)
+        else:
+            self.evaluateExact(childpool, origin, divergence)
+        if self.surrogate is not None:
+            # online retraining on the simulated children
+            self.surrogate.update(childpool,
+                                  np.flatnonzero(childpool.evaluated))
+            self.surrogate.fit()
+        self.child_fitness = childpool.ranking.mean
+        self.alive = 0
+
+    def screenChildren(self, childpool, origin=None, divergence=None):
+        """
+        Description:
+        ------------
+            multi-fidelity evaluation of the children. All children are
+            simulated with the coarse engine, only the best coarseFraction
+            of them by coarse fitness is simulated exactly. The others keep
+            their coarse fitness and stay unevaluated, so they are simulated
+            exactly once they survive.
+        Parameters:
+        -----------
+            childpool   : GenomePool
+            origin      : np.array of ints
+                index of the parent every child starts with
+            divergence  : np.array of ints
+                first gene index at which a child may differ from its origin
+        """
+        sim = engine.CoarseEngine(childpool, self.resolution, self.initialPos,
+                                  self.lifeTime, factor=self.coarseFactor,
+                                  target=self.target)
+        sim.run(sim.lifeTime)
+        coarse = fitness.calcFitnessArrays(
+            sim.getPos(), sim.travelDist, self.initialPos, self.target,
+            self.height, self.travel_weight, self.travel_weight)[0]
+
+        count = min(max(int(np.ceil(self.coarseFraction*len(childpool))), 1),
+                    len(childpool))
+        top = np.argpartition(coarse, -count)[-count:]
+        self.evaluateSubset(childpool, coarse, top, self.evaluateExact,
+                            origin, divergence, self.screening)
+
+    def prescreenChildren(self, childpool, origin=None, divergence=None):
+        """
+        Description:
+        ------------
+            surrogate-assisted evaluation of the children. Only the best
+            surrogateFraction of the children by predicted fitness and a
+            random surrogateExplore fraction of the others are simulated.
+            The others get fitness -inf and stay unevaluated, so 'rpl'
+            never admits them.
+        Parameters:
+        -----------
+            childpool   : GenomePool
+            origin      : np.array of ints
+                index of the parent every child starts with
+            divergence  : np.array of ints
+                first gene index at which a child may differ from its origin
+        """
+        predicted = self.surrogate.predict(childpool)
+        size = len(childpool)
+        count = min(max(int(np.ceil(self.surrogateFraction*size)), 1), size)
+        order = np.argsort(predicted, kind='mergesort')[::-1]
+        rest = order[count:]
+        explore = np.random.permutation(rest)[
+            :int(np.ceil(self.surrogateExplore*len(rest)))]
+        selected = np.concatenate((order[:count], explore))
+        if self.coarseFactor > 1:
+            evaluator = self.screenChildren
+        else:
+            evaluator = self.evaluateExact
+        # children predicted to be hopeless are never admitted
+        estimate = np.full(size, -np.inf)
+        estimate[selected] = predicted[selected]
+        self.evaluateSubset(childpool, estimate, selected, evaluator,
+                            origin, divergence, self.prescreening,
+                            score=predicted)
+
+    def evaluateSubset(self, childpool, estimate, selected, evaluator,
+                       origin=None, divergence=None, stats=None, score=None):
+        """
+        Description:
+        ------------
+            evaluate selected children, all others keep their estimated
+            fitness. Fitness and state of the selected children are stored
+            in childpool. With auditSize > 0 a random audit sample of all
+            children, selected or not, is simulated exactly as well, to
+            measure how well the estimate ranks the children across the
+            cutoff. Audited children with an exact result of the selected
+            evaluation are not simulated again.
+        Parameters:
+        -----------
+            childpool   : GenomePool
+            estimate    : np.array
+                estimated fitness of all children
+            selected    : np.array of ints
+                children to evaluate
+            evaluator   : function
+                evaluation of a pool with origin and divergence, e.g.
+                evaluateExact
+            origin      : np.array of ints
+                index of the parent every child starts with
+            divergence  : np.array of ints
+                first gene index at which a child may differ from its origin
+            stats       : dict
+                counters of children, evaluated children and rank
+                correlations of the audit samples, default: None
+            score       : np.array
+                estimated fitness of all children compared with the audit
+                sample, default: None (estimate)
+        """
+        merged = np.array(estimate, dtype=float)
+        subpool = self.evaluatePart(childpool, merged, selected, evaluator,
+                                    origin, divergence)
+        if stats is None:
+            childpool.fitness = merged
+            return
+        stats['children'] += len(childpool)
+        stats['exact'] += len(selected)
+        if self.auditSize > 0:
+            audit = np.random.choice(len(childpool), min(
+                self.auditSize, len(childpool)), replace=False)
+            # simulated selected children are exact, rejected ones as well
+            exact = selected[subpool.evaluated |
+                             np.isneginf(subpool.fitness)]
+            missing = np.setdiff1d(audit, exact)
+            self.evaluatePart(childpool, merged, missing, self.evaluateExact,
+                              origin, divergence)
+            stats['exact'] += len(np.setdiff1d(missing, selected))
+            if score is None:
+                score = estimate
+            stats['agreement'].append(fitness.rankCorrelation(
+                score[audit], merged[audit]))
+        childpool.fitness = merged
+
+    def evaluatePart(self, childpool, merged, indices, evaluator,
+                     origin=None, divergence=None):
+        """
+        Description:
+        ------------
+            evaluate some children, store their fitness in merged and their
+            state in childpool
+        Parameters:
+        -----------
+            childpool   : GenomePool
+            merged      : np.array
+                fitness of all children
+            indices     : np.array of ints
+                children to evaluate
+            evaluator   : function
+                evaluation of a pool with origin and divergence
+            origin      : np.array of ints
+            divergence  : np.array of ints
+        Returns:
+        --------
+            subpool : GenomePool
+                the evaluated children
+        """
+        subpool = childpool.take(indices)
+        if origin is None:
+            evaluator(subpool)
+        else:
+            evaluator(subpool, origin[indices], divergence[indices])
+        merged[indices] = subpool.fitness
+        childpool.storeState(dict((name, values[subpool.evaluated])
+                                  for name, values in subpool.state.items()),
+                             indices[subpool.evaluated])
+        return subpool
+
+    def auditReport(self, stats):
+        """
+        Returns:
+        --------
+            report : str
+                average rank correlation of the audit samples of a screening,
+                empty without audit
+        """
+        if not stats['agreement']:
+            return ""
+        return ", rank correlation %.2f" % np.nanmean(stats['agreement'])
 
+    def evaluateExact(self, childpool, origin=None, divergence=None):
+        """
+        Description:
+        ------------
+            simulate children with the world engine and store their fitness
+        Parameters:
+        -----------
+            childpool   : GenomePool
+            origin      : np.array of ints
+                index of the parent every child starts with
+            divergence  : np.array of ints
+                first gene index at which a child may differ from its origin
+        """
+        # children can only replace the worst individuals, if they beat the
+        # populationSize-th best fitness of the current population
+        threshold = None
+        if (self.pruneChildren and len(self.pool) >= self.populationSize and
+                self.modes[4] == selection.survirorselectionmode.get(1) and
+                self.engineMode == engine.enginemodes.get(0)):
+            threshold = np.partition(self.pool.fitness, -self.populationSize
+                                     )[-self.populationSize]
+        # children are never drawn, so only children unknown to the fitness
+        # cache are simulated, starting from the checkpoints of their parents
+        if (self.fitnessCache is not None or origin is not None or
+                threshold is not None or self.executor.parallel):
+            sim = self.restoreEngine(childpool, self.pool, origin, divergence,
+                                     threshold)
+        else:
+            sim = self.createEngine(childpool, record=not self.streamFitness)
+            sim.run(self.lifeTime)
+        self.evaluate(sim, childpool)
+
+    def evaluate(self, sim, pool, rockets=None):
+        """
+        Description:
+        ------------
+            calculate the fitness of a simulated population and store it in
+            the genome pool
+        Parameters:
+        -----------
+            sim     : PopulationEngine
+                engine after the simulation of pool
+            pool    : GenomePool
+            rockets : list of Rocket, optional
+                rockets whose fitness is updated as well
+        Returns:
+        --------
+            avg_fitness : float
+                average fitness of the population
+        """
+        pool.fitness = fitness.calcFitnessArrays(
+            sim.getPos(), sim.travelDist, self.initialPos, self.target,
+            self.height, self.travel_weight, self.travel_weight)[0]
+        state = sim.state()
+        if sim.rejected.any():
+            # rejected individuals are never admitted, their state is not
+            # final
+            fitness_values = pool.fitness.copy()
+            fitness_values[sim.rejected] = -np.inf
+            pool.fitness = fitness_values
+            accepted = np.flatnonzero(~sim.rejected)
+            state = dict((name, values[accepted])
+                         for name, values in state.items())
+        else:
+            accepted = None
+        pool.storeState(state, accepted)
+        if self.fitnessCache is not None:
+            self.fitnessCache.store(pool, state, accepted)
+        if rockets is not None:
+            self.maxfitness = pool.ranking.max
+            for rocket, value in zip(rockets, pool.fitness):
+                rocket.fitness = value
+        return pool.ranking.mean
+
+    def createEngine(self, pool, record=True):
+        """
+        Description:
+        ------------
+            set up the batched simulation engine for a genome pool
+        Parameters:
+        -----------
+            pool    : GenomePool
+            record  : boolean
+                store the full trajectories, default: True
+        Returns:
+        --------
+            engine : PopulationEngine
+        """
+        return engine.create_engine(self.engineMode, pool, self.resolution,
+                                    self.initialPos, self.lifeTime,
+                                    record=record, target=self.target,
+                                    checkpointEvery=self.checkpointEvery)
+
+    def restoreEngine(self, pool, parents=None, origin=None, divergence=None,
+                      threshold=None):
+        """
+        Description:
+        ------------
+            engine in the final state of a genome pool. Individuals with a
+            known final state, from a former generation or from the fitness
+            cache, are restored, only the others are simulated by the
+            executor. Children
+            resume from the checkpoints of their origin parent at their
+            divergence index. Trajectories are not recorded.
+        Parameters:
+        -----------
+            pool        : GenomePool
+            parents     : GenomePool
+                pool of the parents, default: None (no resume)
+            origin      : np.array of ints
+                index of the parent every individual starts with
+            divergence  : np.array of ints
+                first gene index at which an individual may differ from its
+                origin parent
+            threshold   : float
+                admission threshold, simulated individuals are rejected as
+                soon as their fitness bound falls below it, default: None
+        Returns:
+        --------
+            engine : PopulationEngine
+        """
+        if self.fitnessCache is not None:
+            hits, state = self.fitnessCache.lookup(
+                pool, np.flatnonzero(~pool.evaluated))
+            pool.storeState(state, hits)
+        known = np.flatnonzero(pool.evaluated)
+        new = np.flatnonzero(~pool.evaluated)
+        sim = engine.PopulationEngine(pool, self.resolution, self.initialPos,
+                                      self.lifeTime, record=False,
+                                      target=self.target)
+        sim.restore(known, dict((name, values[known])
+                                for name, values in pool.state.items()))
+        if len(new):
+            checkpoints = None
+            resumeAt = None
+            if parents is not None and origin is not None:
+                checkpoints = dict((name[3:], values[origin[new]])
+                                   for name, values in parents.state.items()
+                                   if name.startswith('cp_'))
+                resumeAt = np.where(parents.evaluated[origin[new]],
+                                    divergence[new], 0)
+            state, rejected = self.executor.simulate(
+                self.simulationParams(), pool.take(new), checkpoints,
+                resumeAt, threshold)
+            sim.restore(new, state)
+            sim.rejected[new] = rejected
+        sim.updateCounter = self.lifeTime
+        return sim
+
+    def simulationParams(self):
+        """
+        Returns:
+        --------
+            params : dict
+                world parameters of a simulation, see
+                executor.simulate_chunk
+        """
+        return {'engine': self.engineMode, 'resolution': self.resolution,
+                'initialPos': self.initialPos, 'lifeTime': self.lifeTime,
+                'target': self.target,
+                'checkpointEvery': self.checkpointEvery,
+                'pruneEvery': self.pruneEvery,
+                'target_weight': self.travel_weight,
+                'travel_weight': self.travel_weight}
 
     def createNewGen(self):
         self.alive = 0
@@ -131,87 +635,147 @@ class RocketWorld(object):
         #                   SECTION PARENT SELECTION                           #
         #----------------------------------------------------------------------#
         fitness_limit = 0.9
-        selectSize = np.int(self.populationSize*1)
-        parentdna = []
+        selectSize = int(self.populationSize*1)
         
         if self.modes[0] == selection.parentselectionmodes.get(0):
-            parentdna = selection.fitness_proportional_selection(
-                self.population, self.populationSize, selectSize=selectSize)
+            parents = selection.fitness_proportional_selection_indices(
+                self.pool.fitness, selectSize=selectSize,
+                sampler=self.sampler)
         elif self.modes[0] == selection.parentselectionmodes.get(1):
-            parentdna = selection.ranking_selection(
-                self.population, self.populationSize, selectSize=selectSize,
-                mode='lin')
+            parents = selection.ranking_selection_indices(
+                self.pool.fitness, selectSize=selectSize, mode='lin',
+                sampler=self.sampler, ranking=self.pool.ranking)
         elif self.modes[0] == selection.parentselectionmodes.get(2):
-            parentdna = selection.ranking_selection(
-                self.population, self.populationSize, selectSize=selectSize,
-                mode='exp')
+            parents = selection.ranking_selection_indices(
+                self.pool.fitness, selectSize=selectSize, mode='exp',
+                sampler=self.sampler, ranking=self.pool.ranking)
         elif self.modes[0] == selection.parentselectionmodes.get(3):
-            parentdna = selection.selection_by_absolute_value(
-                self.population, self.maxfitness, fitness_limit)
+            parents = selection.selection_by_absolute_value_indices(
+                self.pool.fitness, self.pool.ranking.max, fitness_limit)
+        elif self.modes[0] == selection.parentselectionmodes.get(4):
+            parents = selection.tournament_selection_indices(
+                self.pool.fitness, k=self.tournamentSize,
+                selectSize=selectSize)
 
         #!SECTION
         #----------------------------------------------------------------------#
         #                     SECTION VARIATION                                #
         #----------------------------------------------------------------------#
+        # every child records the parent it starts with and the first gene
+        # which may differ from it
+        genes = self.pool.genes
         # No Crossover
         if self.modes[1] == False:
-            childdna = deepcopy(parentdna)
+            childgenes, origin, divergence = variation.copy_parents(
+                genes, parents, record=True)
         # Crossover
         elif self.modes[1] == True:
             if self.modes[2] == variation.crossovermodes.get(0):
-                childdna = variation.crossover_1point(parentdna)
+                childgenes, origin, divergence = \
+                    variation.crossover_1point_matrix(genes, parents,
+                                                      record=True)
             elif self.modes[2] == variation.crossovermodes.get(1):
-                childdna = variation.crossover_full(parentdna)
+                childgenes, origin, divergence = \
+                    variation.crossover_full_matrix(genes, parents,
+                                                    record=True)
             elif self.modes[2] == variation.crossovermodes.get(2):
-                childdna = variation.crossover_npoint(parentdna, 80)
+                childgenes, origin, divergence = \
+                    variation.crossover_npoint_matrix(genes, 80, parents,
+                                                      record=True)
             elif self.modes[2] == variation.crossovermodes.get(3):
-                childdna = variation.simple_arithmetic_crossover(
-                    parentdna, alpha=None, fullmode=None)
-        # Mutation
+                childgenes, origin, divergence = \
+                    variation.simple_arithmetic_crossover_matrix(
+                        genes, parents, alpha=None, fullmode=None,
+                        record=True)
+        # Mutation, children are fresh copies and mutated in place
         if bool(self.modes[3]):
-            childdna = variation.mutate_dnas(childdna, mutation_rate=self.modes[3])
+            childgenes = variation.mutate_matrix(
+                childgenes, mutation_rate=self.modes[3], inplace=True,
+                divergence=divergence)
+        childpool = GenomePool(childgenes)
 
         #!SECTION
         
         #----------------------------------------------------------------------#
         #                 SECTION SURVIVOR SELECTION                           #
         #----------------------------------------------------------------------#
-        # simulate population of children
-        self.evaluateChildren(childdna)
-        # calculate fitness of children
-        self.child_fitness = fitness.calcFitness(self, self.childpopulation)
+        # simulate population of children and calculate their fitness
+        if self.checkpointEvery > 0:
+            self.evaluateChildren(childpool, origin, divergence)
+        else:
+            self.evaluateChildren(childpool)
         # 
         # Age-Based Replacement
         # lifespan 1 generation
         if self.modes[4] == selection.survirorselectionmode.get(0):
-            survivordna = deepcopy(childdna)
+            # children left unsimulated by the surrogate or rejected by
+            # pruning have fitness -inf, the best parents take their places
+            simulated = np.flatnonzero(np.isfinite(childpool.fitness))
+            survivors = len(self.pool) + simulated
+            missing = min(len(childpool), self.populationSize) - len(simulated)
+            if missing > 0:
+                survivors = np.concatenate((
+                    survivors, self.pool.ranking.order[::-1][:missing]))
         # 
         # Fitness-Based Replacement
         # Replace worst (GENITOR)
         elif self.modes[4] == selection.survirorselectionmode.get(1):
-            survivordna = selection.survivor_replace_worst(self.population,
-                                                       self.childpopulation, self.populationSize)
+            survivors = selection.survivor_replace_worst_indices(
+                self.pool.fitness, childpool.fitness, self.populationSize,
+                ranking=self.pool.ranking, childranking=childpool.ranking)
         #!SECTION
         #----------------------------------------------------------------------#
         #                     SECTION REPLACEMENT                              #
         #----------------------------------------------------------------------#
-        self.killCurGen()
-        # flag for rocket with max fitness in current generation
-        king = False
-        for i in range(self.populationSize):
-            if i < len(survivordna):
-                # flag for rocket with max fitness in current generation
-                if i == self.populationSize-1:
-                    king = True
-                self.population.add(Rocket(self.imgFolder, self.resolution, i,
-                                           dna=survivordna[self.populationSize-1-i],king=king))
-            else:
-                self.population.add(Rocket(self.imgFolder, self.resolution, i))
+        # survivors in reversed order, the first survivor (max fitness in
+        # current generation) is flagged as king
+        pool = GenomePool.gather([self.pool, childpool], survivors[::-1])
+        pool.age += 1
+        king = len(pool)-1
+        if len(pool) < self.populationSize:
+            pool = pool.concatenate(GenomePool.random(
+                self.populationSize-len(pool)))
+        self.pool = pool
+        self.populate(self.pool, king=king)
         return
         #!SECTION
 
+    def emigrants(self, count):
+        """
+        Description:
+        ------------
+            copies of the best individuals of the current generation
+        Parameters:
+        -----------
+            count : int
+                number of emigrants
+        Returns:
+        --------
+            migrants : GenomePool
+                best individuals first, with fitness and final state
+        """
+        return self.pool.take(self.pool.ranking.order[::-1][:count])
+
+    def immigrate(self, migrants):
+        """
+        Description:
+        ------------
+            replace the worst individuals of the current generation by
+            migrants, which keep their fitness and final state
+        Parameters:
+        -----------
+            migrants : GenomePool
+        """
+        count = min(len(migrants), len(self.pool))
+        keep = self.pool.ranking.order[count:]
+        pool = GenomePool.gather([self.pool, migrants], np.concatenate(
+            (keep, len(self.pool) + np.arange(count))))
+        self.pool = pool
+        self.maxfitness = pool.ranking.max
+        self.populate(self.pool, king=pool.ranking.best)
+
     def killCurGen(self):
-        self.population = pg.sprite.Group()
+        self.population = self.createGroup()
         return
 
     def eventCheck(self):
@@ -281,6 +845,59 @@ class RocketWorld(object):
         pg.display.flip()
         #!SECTION
 
+    def evaluateGeneration(self):
+        """
+        Description:
+        ------------
+            simulate the current generation, drawn step by step unless in
+            simulation mode, and store its fitness
+        Returns:
+        --------
+            avg_fitness : float
+                average fitness of the current generation
+        """
+        rockets = self.population.sprites()
+        if self.simulate and (self.reuseFitness or
+                              self.fitnessCache is not None or
+                              self.executor.parallel):
+            # survivors keep their final state, only new individuals
+            # are simulated
+            if not self.reuseFitness:
+                self.pool.evaluated[:] = False
+            if not self.headless:
+                self.eventCheck()
+            sim = self.restoreEngine(self.pool)
+            self.alive = 0
+        else:
+            # batched simulation of the whole population, trajectories
+            # are only needed if the population can be drawn
+            sim = self.createEngine(self.pool, record=not (
+                self.streamFitness and self.headless))
+            # lifecyle iteration
+            for curLifetime in range(self.lifeTime):
+                # clock ticks for drawing
+                if self.simulate == False:
+                    self.__clock.tick(self.framerate)
+                # check for events
+                if not self.headless:
+                    self.eventCheck()
+
+                # update rockets
+                self.alive = sim.step()
+                # draw rockets
+                if self.simulate == False:
+                    sim.syncStep(rockets)
+                    self.draw()
+                if (self.alive == 0):
+                    break
+                self.alive = 0
+        sim.apply(rockets)
+        af = self.evaluate(sim, self.pool, rockets)
+        if self.surrogate is not None and self.generation == 1:
+            self.surrogate.update(self.pool)
+            self.surrogate.fit()
+        return af
+
     def run(self):
         """
         Description:
@@ -300,48 +917,51 @@ class RocketWorld(object):
 
         # init live plotter for average fitness
         FitnessPlotter = plots.AverageFitness(
-            self, self.modes)
+            self, self.modes, interactive=not self.headless)
 
-        # display usage hints
-        ut.display_hints(self)
+        if not self.headless:
+            # display usage hints
+            ut.display_hints(self)
         # wait for key press 'r' to run algorithm
         while not self.start:
             self.eventCheck()
 
-        while self.start:
-            # lifecyle iteration
-            for curLifetime in range(self.lifeTime):
-                # clock ticks for drawing
-                if self.simulate == False:
-                    self.__clock.tick(self.framerate)
-                # check for events
-                self.eventCheck()
-
-                # update rockets
-                for rocket in self.population:
-                    rocket.update(simulate=self.simulate)
-                    if(rocket.killFlag == False):
-                        self.alive += 1
-                # draw rockets
-                if self.simulate == False:
-                    self.draw()
-                if (self.alive == 0):
+        # worker threads and processes are stopped on errors as well
+        try:
+            while self.start:
+                # evaluate the fitness of current generation
+                af = self.evaluateGeneration()
+                print("Generation %s: Average Fitness: %s" %
+                      (self.generation, round(af)))
+
+                # update fitness plot
+                FitnessPlotter.update(af, self.child_fitness,
+                                      self.maxfitness)
+
+                # check for generation limit and save plots
+                if self.generation == self.max_genenerations:
+                    FitnessPlotter.save_figure()
+                    if not self.headless:
+                        print("Sprite cache: %(hits)s hits, %(misses)s "
+                              "misses" % surface_cache_info())
+                    if self.fitnessCache is not None:
+                        print("Fitness cache: %(hits)s hits, %(misses)s "
+                              "misses, hit rate %(rate).2f" %
+                              self.fitnessCache.info())
+                    if self.screening['children']:
+                        print("Coarse screening: %s of %s children simulated "
+                              "exactly%s" % (self.screening['exact'],
+                                             self.screening['children'],
+                                             self.auditReport(self.screening)))
+                    if self.prescreening['children']:
+                        print("Surrogate: %s of %s children simulated%s" % (
+                            self.prescreening['exact'],
+                            self.prescreening['children'],
+                            self.auditReport(self.prescreening)))
+                    self.start = False
                     break
-                self.alive = 0
-
-            # evaluate the fitness of current generation
-            af = fitness.calcFitness(self, self.population)
-            print("Generation %s: Average Fitness: %s" %
-                  (self.generation, round(af)))
-
-            # update fitness plot
-            FitnessPlotter.update(af, self.child_fitness, self.maxfitness)
-
-            # check for generation limit and save plots
-            if self.generation == self.max_genenerations:
-                FitnessPlotter.save_figure()
-                self.start = False
-                break
 
-            # create next generation
-            self.createNewGen()
+                # create next generation
+                self.createNewGen()
+        finally:
+            self.executor.close()
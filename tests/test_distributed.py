@@ -0,0 +1,96 @@
+# coding: utf8
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from rocketlib.dna import GenomePool
+from rocketlib.executor import EvaluationExecutor
+from rocketlib.distributed import (Coordinator, recv_message,
+                                   start_local_workers)
+
+params = {'engine': 'step', 'resolution': (1280, 800),
+          'initialPos': (640., 790.), 'lifeTime': 100, 'target': (240, 600),
+          'checkpointEvery': 0, 'pruneEvery': 10, 'target_weight': 4,
+          'travel_weight': 4}
+
+
+def dying_worker(address, received):
+    # takes one batch and disconnects without an answer
+    sock = socket.create_connection(address)
+    received.set()
+    recv_message(sock)
+    # forked worker processes share the socket, close it for all of them
+    sock.shutdown(socket.SHUT_RDWR)
+    sock.close()
+
+
+def test_tcp_workers_equal_serial():
+    np.random.seed(0)
+    pool = GenomePool.random(200)
+    state, rejected = EvaluationExecutor('serial').simulate(params, pool)
+
+    coordinator = Coordinator(('localhost', 0), chunkSize=10, timeout=30)
+    received = threading.Event()
+    dying = threading.Thread(target=dying_worker,
+                             args=(coordinator.address, received))
+    dying.start()
+    received.wait(30)
+    processes = start_local_workers(2, coordinator.address)
+    try:
+        assert coordinator.waitForWorkers(3, 30)
+        fitness, tcpstate, tcprejected = coordinator.evaluate(
+            params, pool, wait=60)
+        assert coordinator.requeued >= 1
+        assert len(fitness) == len(pool)
+        assert sorted(tcpstate) == sorted(state)
+        for name in state:
+            assert np.array_equal(tcpstate[name], state[name]), name
+        assert np.array_equal(tcprejected, rejected)
+    finally:
+        coordinator.close()
+        dying.join(30)
+        for process in processes:
+            process.join(30)
+
+
+def test_tcp_worker_reconnects():
+    # the only worker drops a batch and a worker connects again within the
+    # grace period
+    np.random.seed(1)
+    pool = GenomePool.random(50)
+    state, rejected = EvaluationExecutor('serial').simulate(params, pool)
+
+    coordinator = Coordinator(('localhost', 0), chunkSize=10)
+    processes = []
+
+    def reconnect(address, received):
+        dying_worker(address, received)
+        processes.extend(start_local_workers(1, address))
+
+    received = threading.Event()
+    thread = threading.Thread(target=reconnect,
+                              args=(coordinator.address, received))
+    thread.start()
+    try:
+        assert coordinator.waitForWorkers(1, 30)
+        tcpstate, tcprejected = coordinator.simulate(params, pool)
+        assert coordinator.requeued == 1
+        for name in state:
+            assert np.array_equal(tcpstate[name], state[name]), name
+        assert np.array_equal(tcprejected, rejected)
+    finally:
+        coordinator.close()
+        thread.join(30)
+        for process in processes:
+            process.join(30)
+
+
+def test_tcp_without_workers_fails():
+    coordinator = Coordinator(('localhost', 0))
+    try:
+        with pytest.raises(RuntimeError):
+            coordinator.evaluate(params, GenomePool.random(10))
+    finally:
+        coordinator.close()
@@ -0,0 +1,89 @@
+# coding: utf8
+import os
+import copy
+
+import numpy as np
+
+import rocketlib.engine as engine
+from rocketlib.dna import GenomePool
+
+resolution = (1280, 800)
+initialPos = (640, 789.5)
+lifeTime = 200
+target = (240, 600)
+imgFolder = os.path.join(os.path.dirname(__file__), os.pardir, 'img')
+
+
+def test_step_equals_rocket_update():
+    # the batched engine reproduces Rocket.update with the pixel snapping of
+    # pygame.Rect, including rockets without further dna and crashes
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame as pg
+    from rocketlib.population import Rocket
+
+    # the sprite images are converted to the display format
+    pg.display.init()
+    pg.display.set_mode(resolution)
+
+    np.random.seed(1)
+    rockets = [Rocket(imgFolder, resolution, i) for i in range(200)]
+    for rocket in rockets[:20]:
+        rocket.dna.path = rocket.dna.path[:, :50]
+        rocket.dna.accSteps = 50
+    sim = engine.PopulationEngine([rocket.dna for rocket in rockets],
+                                  resolution, rockets[0].getInitialPos(),
+                                  lifeTime)
+    references = [Rocket(imgFolder, resolution, i,
+                         dna=copy.deepcopy(rocket.dna))
+                  for i, rocket in enumerate(rockets)]
+    for step in range(lifeTime):
+        for reference in references:
+            reference.update(simulate=True)
+        sim.step()
+    sim.apply(rockets)
+
+    assert any(reference.killFlag for reference in references)
+    for rocket, reference in zip(rockets, references):
+        assert rocket.rect.center == reference.rect.center
+        assert rocket.curSpeed == reference.curSpeed
+        assert rocket.killFlag == reference.killFlag
+        assert rocket.dnaCounter == reference.dnaCounter
+        assert np.array_equal(rocket.trajectory, reference.trajectory)
+
+
+def test_resume_equals_full_simulation():
+    np.random.seed(2)
+    size = 60
+    parents = GenomePool.random(size)
+    sim = engine.PopulationEngine(parents, resolution, initialPos, lifeTime,
+                                  record=False, target=target,
+                                  checkpointEvery=10)
+    sim.run(lifeTime)
+    checkpoints = dict((name[3:], values)
+                       for name, values in sim.state().items()
+                       if name.startswith('cp_'))
+
+    # divergence on, between and behind the checkpoints, children change
+    # their genes from the divergence index on
+    divergence = np.random.randint(0, lifeTime + 1, size)
+    divergence[:6] = [0, 9, 10, 11, 37, lifeTime]
+    genes = parents.genes.copy()
+    for i, d in enumerate(divergence):
+        genes[i, :, d:] = np.random.uniform(-1, 1, genes[i, :, d:].shape)
+    children = GenomePool(genes, parents.length.copy())
+
+    full = engine.PopulationEngine(children, resolution, initialPos,
+                                   lifeTime, record=False, target=target,
+                                   checkpointEvery=10)
+    full.run(lifeTime)
+    resumed = engine.PopulationEngine(children, resolution, initialPos,
+                                      lifeTime, record=False, target=target,
+                                      checkpointEvery=10)
+    resumed.resume(checkpoints, divergence)
+    assert np.array_equal(resumed.startStep[:6], [0, 0, 10, 10, 30, 200])
+    resumed.run(lifeTime - resumed.updateCounter)
+
+    state, resumedState = full.state(), resumed.state()
+    assert sorted(state) == sorted(resumedState)
+    for name in state:
+        assert np.array_equal(state[name], resumedState[name]), name
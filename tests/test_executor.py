@@ -0,0 +1,53 @@
+# coding: utf8
+import numpy as np
+
+from rocketlib.dna import GenomePool
+from rocketlib.executor import EvaluationExecutor
+
+params = {'engine': 'step', 'resolution': (1280, 800),
+          'initialPos': (640., 790.), 'lifeTime': 100, 'target': (240, 600),
+          'checkpointEvery': 10, 'pruneEvery': 10, 'target_weight': 4,
+          'travel_weight': 4}
+
+
+def children(seed=0, size=120):
+    # children which differ from their parent from a random gene on, with
+    # the checkpoints of the parent
+    np.random.seed(seed)
+    parents = GenomePool.random(size)
+    state, _ = EvaluationExecutor('serial').simulate(params, parents)
+    checkpoints = dict((name[3:], values) for name, values in state.items()
+                       if name.startswith('cp_'))
+    divergence = np.random.randint(0, params['lifeTime'], size)
+    pool = GenomePool(parents.genes.copy(), parents.length.copy())
+    pool.genes[np.arange(size), :, divergence] += 1.
+    return pool, checkpoints, divergence
+
+
+def assert_equal(result, reference):
+    state, rejected = result
+    assert sorted(state) == sorted(reference[0])
+    for name in state:
+        assert np.array_equal(state[name], reference[0][name]), name
+    assert np.array_equal(rejected, reference[1])
+
+
+def test_backends_equal_serial():
+    pool, checkpoints, divergence = children()
+    for threshold in (None, 40.):
+        reference = EvaluationExecutor('serial').simulate(
+            params, pool, checkpoints, divergence, threshold)
+        if threshold is not None:
+            assert reference[1].any() and not reference[1].all()
+        for mode, workers, chunkSize in [('serial', None, 7),
+                                         ('thread', 2, None),
+                                         ('thread', 3, 11),
+                                         ('process', 2, None),
+                                         ('process', 3, 13)]:
+            executor = EvaluationExecutor(mode, workers, chunkSize)
+            try:
+                assert_equal(executor.simulate(params, pool, checkpoints,
+                                               divergence, threshold),
+                             reference)
+            finally:
+                executor.close()
@@ -0,0 +1,43 @@
+# coding: utf8
+import random
+
+import numpy as np
+
+from rocketlib.world import RocketWorld
+
+
+def evolve(generations=8, **kwargs):
+    """ survivors after every generation and the number of rejected children """
+    np.random.seed(0)
+    random.seed(0)
+    world = RocketWorld(60, (1280, 800), 150, (240, 600), headless=True,
+                        modes=['lin', True, 'arith', 0.1, 'rpl'], **kwargs)
+    rejected = []
+    evaluateChildren = world.evaluateChildren
+
+    def count(childpool, *args):
+        evaluateChildren(childpool, *args)
+        rejected.append(np.count_nonzero(np.isneginf(childpool.fitness)))
+
+    world.evaluateChildren = count
+    world.createInitialGen()
+    world.evaluateGeneration()
+    history = []
+    for generation in range(generations):
+        world.createNewGen()
+        world.evaluateGeneration()
+        history.append((world.pool.genes.copy(), world.pool.fitness.copy()))
+    world.executor.close()
+    return history, sum(rejected)
+
+
+def test_pruning_keeps_survivors():
+    for kwargs in ({'cacheSize': 0}, {'checkpointEvery': 10}):
+        reference, none = evolve(**kwargs)
+        pruned, rejected = evolve(pruneChildren=True, **kwargs)
+        assert none == 0
+        assert rejected > 0
+        for (genes, fitness), (prunedGenes, prunedFitness) in zip(
+                reference, pruned):
+            assert np.array_equal(genes, prunedGenes)
+            assert np.array_equal(fitness, prunedFitness)
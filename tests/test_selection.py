@@ -0,0 +1,34 @@
+# coding: utf8
+import numpy as np
+
+from rocketlib.dna import FitnessRanking
+from rocketlib.selection import survivor_replace_worst_indices
+
+
+def test_replace_worst_ties_at_the_top():
+    # more individuals tie at the top fitness than survive, the king of the
+    # shared rankings may not be among the selected survivors
+    for seed in range(50):
+        rng = np.random.RandomState(seed)
+        size = 1000
+        fitness = np.full(size, 5.)
+        fitness[rng.randint(size, size=10)] = 1.
+        childfitness = np.full(size, 5.)
+        survivors = survivor_replace_worst_indices(
+            fitness, childfitness, size, ranking=FitnessRanking(fitness),
+            childranking=FitnessRanking(childfitness))
+        combined = np.concatenate((fitness, childfitness))
+        assert len(survivors) == size
+        assert len(np.unique(survivors)) == size
+        assert combined[survivors[0]] == combined.max()
+        assert np.all(combined[survivors] == 5.)
+
+
+def test_replace_worst_king_first():
+    fitness = np.array([3., 9., 1., 4.])
+    childfitness = np.array([7., 2., 8., 0.])
+    survivors = survivor_replace_worst_indices(
+        fitness, childfitness, 3, ranking=FitnessRanking(fitness),
+        childranking=FitnessRanking(childfitness))
+    assert survivors[0] == 1
+    assert sorted(survivors) == [1, 4, 6]